@@ -0,0 +1,63 @@
+"""baseline schema: users, environments, wireless_scans
+
+Revision ID: 1a6f3c9e2b04
+Revises: 
+Create Date: 2026-10-19 08:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1a6f3c9e2b04'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('username', sa.String(length=80), nullable=False),
+    sa.Column('password_hash', sa.String(length=120), nullable=False),
+    sa.Column('is_admin', sa.Boolean(), nullable=False),
+    sa.Column('is_approved', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('username')
+    )
+    op.create_table('environments',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('created_by', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name', 'created_by', name='_environment_name_admin_uc')
+    )
+    op.create_table('wireless_scans',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('environment_id', sa.Integer(), nullable=False),
+    sa.Column('bssid', sa.String(length=17), nullable=False),
+    sa.Column('ssid', sa.String(length=32), nullable=False),
+    sa.Column('quality', sa.Integer(), nullable=True),
+    sa.Column('signal', sa.Integer(), nullable=True),
+    sa.Column('channel', sa.Integer(), nullable=True),
+    sa.Column('encryption', sa.String(length=50), nullable=True),
+    sa.Column('timestamp', sa.DateTime(), nullable=False),
+    sa.Column('remarks', sa.Text(), nullable=True),
+    sa.Column('rogue_ap_potential', sa.Boolean(), nullable=False),
+    sa.Column('uploaded_by', sa.Integer(), nullable=False),
+    sa.Column('uploaded_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['environment_id'], ['environments.id'], ),
+    sa.ForeignKeyConstraint(['uploaded_by'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('environment_id', 'bssid', 'ssid', name='_scan_dedup_uc')
+    )
+
+
+def downgrade():
+    op.drop_table('wireless_scans')
+    op.drop_table('environments')
+    op.drop_table('users')
@@ -0,0 +1,50 @@
+"""upload ledger: uploads table
+
+Revision ID: 3c8e5d1f9a27
+Revises: 1a6f3c9e2b04
+Create Date: 2026-10-19 08:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c8e5d1f9a27'
+down_revision = '1a6f3c9e2b04'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # A database adopted at the baseline may already have the table from create_all
+    if 'uploads' in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_table('uploads',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('environment_id', sa.Integer(), nullable=False),
+    sa.Column('uploaded_by', sa.Integer(), nullable=False),
+    sa.Column('filename', sa.String(length=255), nullable=True),
+    sa.Column('digest', sa.String(length=64), nullable=False),
+    sa.Column('size_bytes', sa.Integer(), nullable=False),
+    sa.Column('total_rows', sa.Integer(), nullable=False),
+    sa.Column('inserted_rows', sa.Integer(), nullable=False),
+    sa.Column('duplicate_rows', sa.Integer(), nullable=False),
+    sa.Column('parse_ms', sa.Integer(), nullable=False),
+    sa.Column('commit_ms', sa.Integer(), nullable=False),
+    sa.Column('uploaded_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['environment_id'], ['environments.id'], ),
+    sa.ForeignKeyConstraint(['uploaded_by'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('environment_id', 'digest', name='_upload_digest_uc')
+    )
+    with op.batch_alter_table('uploads', schema=None) as batch_op:
+        batch_op.create_index('ix_uploads_environment_uploaded_at', ['environment_id', 'uploaded_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('uploads', schema=None) as batch_op:
+        batch_op.drop_index('ix_uploads_environment_uploaded_at')
+
+    op.drop_table('uploads')
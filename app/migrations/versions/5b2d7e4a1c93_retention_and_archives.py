@@ -0,0 +1,56 @@
+"""retention policy columns and scan_archives table
+
+Revision ID: 5b2d7e4a1c93
+Revises: 3c8e5d1f9a27
+Create Date: 2026-10-19 08:35:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b2d7e4a1c93'
+down_revision = '3c8e5d1f9a27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # A database adopted at the baseline may already have these from create_all
+    inspector = sa.inspect(op.get_bind())
+    columns = {column['name'] for column in inspector.get_columns('environments')}
+
+    if 'retention_days' not in columns:
+        with op.batch_alter_table('environments', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('retention_days', sa.Integer(), nullable=True))
+            batch_op.add_column(sa.Column('idle_archive_days', sa.Integer(), nullable=True))
+
+    if 'scan_archives' not in inspector.get_table_names():
+        op.create_table('scan_archives',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('environment_id', sa.Integer(), nullable=False),
+        sa.Column('path', sa.String(length=500), nullable=False),
+        sa.Column('reason', sa.String(length=20), nullable=False),
+        sa.Column('scan_count', sa.Integer(), nullable=False),
+        sa.Column('unique_networks', sa.Integer(), nullable=False),
+        sa.Column('rogue_count', sa.Integer(), nullable=False),
+        sa.Column('oldest_timestamp', sa.DateTime(), nullable=True),
+        sa.Column('newest_timestamp', sa.DateTime(), nullable=True),
+        sa.Column('size_bytes', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['environment_id'], ['environments.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('scan_archives', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_scan_archives_environment_id'), ['environment_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('scan_archives', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_scan_archives_environment_id'))
+
+    op.drop_table('scan_archives')
+    with op.batch_alter_table('environments', schema=None) as batch_op:
+        batch_op.drop_column('idle_archive_days')
+        batch_op.drop_column('retention_days')
@@ -0,0 +1,41 @@
+"""sensor push API: sensor_tokens table
+
+Revision ID: 7e4a9c2f6d18
+Revises: 5b2d7e4a1c93
+Create Date: 2026-10-19 08:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7e4a9c2f6d18'
+down_revision = '5b2d7e4a1c93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # A database adopted at the baseline may already have the table from create_all
+    if 'sensor_tokens' in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_table('sensor_tokens',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('token_hash', sa.String(length=64), nullable=False),
+    sa.Column('environment_id', sa.Integer(), nullable=False),
+    sa.Column('created_by', sa.Integer(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('last_used_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['environment_id'], ['environments.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('token_hash')
+    )
+
+
+def downgrade():
+    op.drop_table('sensor_tokens')
@@ -0,0 +1,32 @@
+"""snapshot cache: environments.data_version
+
+Revision ID: 9f1b3d6e8a45
+Revises: 7e4a9c2f6d18
+Create Date: 2026-10-19 08:45:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9f1b3d6e8a45'
+down_revision = '7e4a9c2f6d18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # A database adopted at the baseline may already have the column from create_all
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('environments')}
+    if 'data_version' in columns:
+        return
+
+    # Existing rows start at version 0, like new environments
+    with op.batch_alter_table('environments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('data_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('environments', schema=None) as batch_op:
+        batch_op.drop_column('data_version')
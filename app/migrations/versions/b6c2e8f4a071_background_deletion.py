@@ -0,0 +1,55 @@
+"""background deletion: progress columns and ON DELETE CASCADE
+
+Revision ID: b6c2e8f4a071
+Revises: 9f1b3d6e8a45
+Create Date: 2026-10-19 08:50:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6c2e8f4a071'
+down_revision = '9f1b3d6e8a45'
+branch_labels = None
+depends_on = None
+
+# Tables whose environment_id foreign key cascades on delete
+CHILD_TABLES = ('wireless_scans', 'uploads', 'scan_archives', 'sensor_tokens')
+
+# The foreign keys were created unnamed; this names them so SQLite batch mode can drop and recreate them
+NAMING_CONVENTION = {'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s'}
+
+
+def _replace_environment_fk(table, ondelete):
+    name = f'fk_{table}_environment_id_environments'
+    with op.batch_alter_table(table, schema=None, naming_convention=NAMING_CONVENTION) as batch_op:
+        batch_op.drop_constraint(name, type_='foreignkey')
+        batch_op.create_foreign_key(name, 'environments', ['environment_id'], ['id'], ondelete=ondelete)
+
+
+def upgrade():
+    # A database adopted at the baseline may already have the columns from create_all
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('environments')}
+    if 'deleting_since' not in columns:
+        with op.batch_alter_table('environments', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('deleting_since', sa.DateTime(), nullable=True))
+            batch_op.add_column(sa.Column('deletion_total', sa.Integer(), nullable=True))
+            batch_op.add_column(sa.Column('deletion_done', sa.Integer(), nullable=False, server_default='0'))
+            batch_op.create_index(batch_op.f('ix_environments_deleting_since'), ['deleting_since'], unique=False)
+
+    # Rebuilding with the cascading key is harmless where it already cascades
+    for table in CHILD_TABLES:
+        _replace_environment_fk(table, 'CASCADE')
+
+
+def downgrade():
+    for table in CHILD_TABLES:
+        _replace_environment_fk(table, None)
+
+    with op.batch_alter_table('environments', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_environments_deleting_since'))
+        batch_op.drop_column('deletion_done')
+        batch_op.drop_column('deletion_total')
+        batch_op.drop_column('deleting_since')
@@ -0,0 +1,33 @@
+"""background deletion: purge claim columns
+
+Revision ID: d3a7f1c5e9b2
+Revises: b6c2e8f4a071
+Create Date: 2026-10-19 10:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3a7f1c5e9b2'
+down_revision = 'b6c2e8f4a071'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # A database adopted at the baseline may already have the columns from create_all
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('environments')}
+    if 'purge_owner' in columns:
+        return
+
+    with op.batch_alter_table('environments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('purge_owner', sa.String(length=32), nullable=True))
+        batch_op.add_column(sa.Column('purge_lease_until', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('environments', schema=None) as batch_op:
+        batch_op.drop_column('purge_lease_until')
+        batch_op.drop_column('purge_owner')
@@ -0,0 +1,37 @@
+"""background deletion: environment names unique among live environments only
+
+Revision ID: e5f2b8d4c1a6
+Revises: d3a7f1c5e9b2
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5f2b8d4c1a6'
+down_revision = 'd3a7f1c5e9b2'
+branch_labels = None
+depends_on = None
+
+LIVE = sa.text('deleting_since IS NULL')
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    constraints = {constraint['name'] for constraint in inspector.get_unique_constraints('environments')}
+    if '_environment_name_admin_uc' in constraints:
+        with op.batch_alter_table('environments', schema=None) as batch_op:
+            batch_op.drop_constraint('_environment_name_admin_uc', type_='unique')
+
+    # A database adopted at the baseline may already have the index from create_all
+    if '_environment_live_name_uc' not in {index['name'] for index in inspector.get_indexes('environments')}:
+        op.create_index('_environment_live_name_uc', 'environments', ['name', 'created_by'], unique=True,
+                        sqlite_where=LIVE, postgresql_where=LIVE)
+
+
+def downgrade():
+    op.drop_index('_environment_live_name_uc', table_name='environments')
+    with op.batch_alter_table('environments', schema=None) as batch_op:
+        batch_op.create_unique_constraint('_environment_name_admin_uc', ['name', 'created_by'])
@@ -1,5 +1,8 @@
 import os
+import sqlite3
 from flask import Flask
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_wtf.csrf import CSRFProtect
@@ -10,6 +13,36 @@ login_manager = LoginManager()
 csrf = CSRFProtect()
 migrate = Migrate()
 
+@event.listens_for(Engine, 'connect')
+def _configure_sqlite(dbapi_connection, connection_record):
+    # WAL lets readers in other workers/threads proceed while a write is in progress
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        # SQLite only enforces foreign keys (and ON DELETE CASCADE) when asked to, per connection
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.close()
+
+def _env_int(name, default):
+    """Integer setting from the environment; unset and empty (as in .env.example) both mean the default"""
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+def _engine_options(database_uri):
+    """Per-process connection pool settings, sized for threaded workers"""
+    options = {'pool_pre_ping': True}
+    if database_uri.startswith('sqlite'):
+        # Wait for the write lock instead of failing immediately with "database is locked"
+        options['connect_args'] = {'timeout': _env_int('SQLITE_BUSY_TIMEOUT', 30)}
+        if ':memory:' in database_uri or database_uri in ('sqlite://', 'sqlite:///'):
+            return options
+    options['pool_size'] = _env_int('DB_POOL_SIZE', 5)
+    options['max_overflow'] = _env_int('DB_MAX_OVERFLOW', 2)
+    options['pool_timeout'] = _env_int('DB_POOL_TIMEOUT', 30)
+    options['pool_recycle'] = _env_int('DB_POOL_RECYCLE', 1800)
+    return options
+
 def create_app():
     # Get the absolute path to the app directory
     app_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -21,14 +54,32 @@ def create_app():
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key')
     app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URI', 'sqlite:///wifi_scanner.db')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = _engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
     app.config['UPLOAD_FOLDER'] = os.environ.get('UPLOAD_FOLDER', 'uploads')
-    app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_CONTENT_LENGTH', '1048576'))  # 1MB
+    app.config['MAX_CONTENT_LENGTH'] = _env_int('MAX_CONTENT_LENGTH', 1048576)  # 1MB
+    app.config['ARCHIVE_FOLDER'] = os.environ.get('ARCHIVE_FOLDER', 'archives')
+    app.config['RETENTION_CHUNK_SIZE'] = _env_int('RETENTION_CHUNK_SIZE', 5000)
+    app.config['DELETION_CHUNK_SIZE'] = _env_int('DELETION_CHUNK_SIZE', 5000)
+    app.config['DELETION_PAUSE_MS'] = _env_int('DELETION_PAUSE_MS', 50)
+    app.config['INGEST_BATCH_SIZE'] = _env_int('INGEST_BATCH_SIZE', 500)
+    app.config['INGEST_FLUSH_MS'] = _env_int('INGEST_FLUSH_MS', 250)
+    app.config['INGEST_MAX_PENDING'] = _env_int('INGEST_MAX_PENDING', 50000)
+    app.config['SNAPSHOT_CACHE_BYTES'] = _env_int('SNAPSHOT_CACHE_BYTES', 64 * 1024 * 1024)
+    # Optional: keep each environment's scans in its own SQLite file under this folder
+    app.config['SHARD_FOLDER'] = os.environ.get('SHARD_FOLDER', '')
+    app.config['SHARD_FANOUT_THREADS'] = _env_int('SHARD_FANOUT_THREADS', 4)
+    # Shard engines: connections kept per shard, extra ones opened under load, and open shards per worker
+    app.config['SHARD_POOL_SIZE'] = _env_int('SHARD_POOL_SIZE', 1)
+    app.config['SHARD_MAX_OVERFLOW'] = _env_int('SHARD_MAX_OVERFLOW', 4)
+    app.config['SHARD_MAX_ENGINES'] = _env_int('SHARD_MAX_ENGINES', 32)
+    app.config['SQLITE_BUSY_TIMEOUT'] = _env_int('SQLITE_BUSY_TIMEOUT', 30)
     
     # Initialize extensions
     db.init_app(app)
     login_manager.init_app(app)
     csrf.init_app(app)
-    migrate.init_app(app, db)
+    # Migrations ship inside the app package; batch mode lets SQLite alter tables by rebuilding them
+    migrate.init_app(app, db, directory=os.path.join(app_dir, 'migrations'), render_as_batch=True)
     
     # Login manager settings
     login_manager.login_view = 'auth.login'
@@ -43,15 +94,37 @@ def create_app():
     # Register blueprints
     from .routes import main
     from .auth import auth
+    from .api import api
     
     app.register_blueprint(main)
     app.register_blueprint(auth)
+    app.register_blueprint(api)
     
-    # Create tables if they don't exist
-    with app.app_context():
-        db.create_all()
+    # Sensors authenticate with bearer tokens, not session cookies
+    csrf.exempt(api)
+    
+    # Shard sessions are opened per app context, on demand
+    from .shards import close_shard_sessions
+    app.teardown_appcontext(close_shard_sessions)
+    
+    # CLI commands (schema is managed by `flask init-db`, never at import/boot time)
+    from .cli import register_commands
+    register_commands(app)
     
     return app
 
-# Create app instance for direct running
-app = create_app()
\ No newline at end of file
+def dispose_engines(app):
+    """
+    Drop pooled connections inherited from a parent process (e.g. gunicorn
+    preload_app) so each worker opens its own. Parent connections are left
+    open for the parent to keep using.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    
+    # Shard engines and the fan-out pool are rebuilt lazily in the child
+    router = app.extensions.pop('shard_router', None)
+    if router is not None:
+        for engine in router.engines():
+            engine.dispose(close=False)
@@ -0,0 +1,82 @@
+import json
+from datetime import datetime
+from functools import wraps
+from flask import Blueprint, request, jsonify, g
+from .models import SensorToken, db
+from .ingest import parse_sensor_record, get_write_buffer
+
+api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+# Per-request cap on reported validation errors
+MAX_REPORTED_ERRORS = 20
+
+def sensor_token_required(f):
+    """Authenticate a sensor by its bearer token and expose it as g.sensor_token"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        auth_header = request.headers.get('Authorization', '')
+        scheme, _, token = auth_header.partition(' ')
+        if scheme.lower() != 'bearer' or not token.strip():
+            return jsonify({'success': False, 'error': 'Missing bearer token'}), 401
+        
+        sensor_token = SensorToken.query.filter_by(token_hash=SensorToken.hash_token(token.strip()), is_active=True).first()
+        if not sensor_token:
+            return jsonify({'success': False, 'error': 'Invalid or revoked token'}), 401
+        
+        g.sensor_token = sensor_token
+        return f(*args, **kwargs)
+    return decorated
+
+def _read_records():
+    """Decode a JSON object/array or NDJSON request body into a list of records"""
+    body = request.get_data(cache=False, as_text=True)
+    if request.mimetype in ('application/x-ndjson', 'application/ndjson'):
+        return [json.loads(line) for line in body.splitlines() if line.strip()]
+    
+    payload = json.loads(body)
+    if isinstance(payload, dict) and isinstance(payload.get('scans'), list):
+        return payload['scans']
+    return payload if isinstance(payload, list) else [payload]
+
+@api.route('/scans', methods=['POST'])
+@sensor_token_required
+def push_scans():
+    sensor_token = g.sensor_token
+    
+    try:
+        records = _read_records()
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'Invalid JSON: {str(e)}'}), 400
+    
+    rows = []
+    errors = []
+    rejected = 0
+    for index, record in enumerate(records):
+        row, error = parse_sensor_record(record, sensor_token.environment_id, sensor_token.created_by)
+        if error:
+            rejected += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append(f'Record {index + 1}: {error}')
+            continue
+        rows.append(row)
+    
+    if rows and not get_write_buffer().add(rows):
+        response = jsonify({'success': False, 'error': 'Ingest buffer full, retry later'})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+    
+    # Touch last_used_at at most once a minute to keep token lookups write-free
+    now = datetime.utcnow()
+    if not sensor_token.last_used_at or (now - sensor_token.last_used_at).total_seconds() > 60:
+        sensor_token.last_used_at = now
+        try:
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+    
+    return jsonify({
+        'success': True,
+        'accepted': len(rows),
+        'rejected': rejected,
+        'errors': errors
+    }), 202
@@ -0,0 +1,104 @@
+import os
+import click
+from flask import current_app
+from flask_migrate import stamp, upgrade
+from sqlalchemy import inspect
+from . import db
+
+# First migration: the schema databases had before migrations were shipped
+BASELINE_REVISION = '1a6f3c9e2b04'
+
+def register_commands(app):
+    """Attach the maintenance commands to the Flask CLI"""
+    app.cli.add_command(init_db)
+    app.cli.add_command(reset_db)
+    app.cli.add_command(apply_retention)
+    app.cli.add_command(purge_deleted)
+    app.cli.add_command(shard_scans)
+
+@click.command('init-db')
+def init_db():
+    """Create or upgrade the database schema by applying the migrations."""
+    migrations_dir = current_app.extensions['migrate'].directory
+    tables = set(inspect(db.engine).get_table_names())
+    if 'users' in tables and 'alembic_version' not in tables:
+        # Created by create_all before migrations were shipped: adopt it at the baseline, then upgrade
+        stamp(directory=migrations_dir, revision=BASELINE_REVISION)
+    upgrade(directory=migrations_dir)
+    _enable_incremental_vacuum()
+    print("Database initialized!")
+
+@click.command('reset-db')
+def reset_db():
+    """Reset the database (WARNING: This will delete all data!)."""
+    db.drop_all()
+    db.create_all()
+    # create_all builds the current schema; record that so init-db does not replay the migrations
+    stamp(directory=current_app.extensions['migrate'].directory)
+    _enable_incremental_vacuum()
+    print("Database reset!")
+
+def _enable_incremental_vacuum():
+    # Converting an existing database is a full VACUUM; do it here, never in a worker's purge
+    from .models import Environment
+    from .retention import enable_incremental_vacuum
+    from .shards import get_router
+    
+    enable_incremental_vacuum()
+    router = get_router()
+    if router is not None:
+        for (environment_id,) in db.session.query(Environment.id):
+            if os.path.exists(router.path(environment_id)):
+                enable_incremental_vacuum(router.engine(environment_id))
+
+@click.command('apply-retention')
+def apply_retention():
+    """Archive scans according to each environment's retention policy."""
+    from .retention import apply_retention as run_retention
+    archives = run_retention()
+    for archive in archives:
+        print(f"Archived {archive.scan_count} scan(s) from environment {archive.environment_id} to {archive.path}")
+    print(f"Retention applied: {len(archives)} archive(s) created.")
+
+@click.command('purge-deleted')
+def purge_deleted():
+    """Finish deleting environments marked for deletion (e.g. after a worker restart)."""
+    from .deletion import purge_pending
+    purged = purge_pending()
+    print(f"Purged {len(purged)} environment(s).")
+
+@click.command('shard-scans')
+def shard_scans():
+    """Move scans from the primary database into per-environment shards (needs SHARD_FOLDER)."""
+    from .ingest import insert_ignoring_duplicates
+    from .models import Environment, WirelessScan
+    from .retention import DEFAULT_CHUNK_SIZE, reclaim_space
+    from .shards import scan_session, sharding_enabled
+    
+    if not sharding_enabled():
+        print("SHARD_FOLDER is not set; nothing to do.")
+        return
+    
+    table = WirelessScan.__table__
+    for environment in Environment.query.all():
+        session = scan_session(environment.id, create=True)
+        moved = 0
+        while True:
+            rows = db.session.query(table).filter(table.c.environment_id == environment.id) \
+                .order_by(table.c.id).limit(DEFAULT_CHUNK_SIZE).all()
+            if not rows:
+                break
+            # Shard ids are reassigned; re-running after an interruption skips rows already copied
+            insert_ignoring_duplicates([{k: v for k, v in row._mapping.items() if k != 'id'} for row in rows], session)
+            session.commit()
+            db.session.execute(table.delete().where(table.c.id.in_([row.id for row in rows])))
+            db.session.commit()
+            moved += len(rows)
+        
+        if moved:
+            Environment.bump_data_version([environment.id])
+            db.session.commit()
+        print(f"Environment {environment.id}: moved {moved} scan(s) to {session.get_bind().url.database}")
+    
+    reclaim_space()
+    print("Scans sharded.")
\ No newline at end of file
@@ -0,0 +1,171 @@
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta
+from flask import current_app
+from .models import Environment, WirelessScan, Upload, ScanArchive, SensorToken, db
+from .retention import delete_in_chunks, reclaim_space, remove_archive_files
+from .shards import scan_engine, scan_session
+from .snapshot import get_snapshot_cache
+
+DEFAULT_CHUNK_SIZE = 5000
+
+# A purge claim not renewed for this long (e.g. its worker died) can be taken over
+PURGE_LEASE_SECONDS = 120
+
+class PurgeClaimLost(Exception):
+    """Raised when another purge run has taken over an environment whose claim expired"""
+
+def mark_for_deletion(environment):
+    """
+    Hide an environment from every listing and revoke its sensor tokens (part
+    of the caller's transaction). The rows themselves are removed afterwards
+    by purge_environment.
+    """
+    environment.deleting_since = datetime.utcnow()
+    environment.deletion_total = scan_session(environment.id).query(WirelessScan) \
+        .filter_by(environment_id=environment.id).count()
+    environment.deletion_done = 0
+    SensorToken.query.filter_by(environment_id=environment.id) \
+        .update({SensorToken.is_active: False}, synchronize_session=False)
+
+def claim_next_deletion(owner):
+    """
+    Claim the oldest environment marked for deletion that no other purge run
+    holds (or whose claim has expired) for owner. Returns its id, or None.
+    """
+    while True:
+        now = datetime.utcnow()
+        unclaimed = db.or_(Environment.purge_lease_until.is_(None), Environment.purge_lease_until < now)
+        environment_id = db.session.query(Environment.id).filter(Environment.deleting_since.isnot(None), unclaimed) \
+            .order_by(Environment.deleting_since).limit(1).scalar()
+        if environment_id is None:
+            return None
+        
+        # Conditional update: only one of several racing workers gets the row
+        claimed = Environment.query.filter(Environment.id == environment_id, unclaimed).update({
+            Environment.purge_owner: owner,
+            Environment.purge_lease_until: now + timedelta(seconds=PURGE_LEASE_SECONDS)
+        }, synchronize_session=False)
+        db.session.commit()
+        if claimed:
+            return environment_id
+
+def purge_environment(environment_id, chunk_size=None, pause=0, owner=None):
+    """
+    Delete an environment marked for deletion: scans in bounded chunks with
+    progress recorded after each one, then the small child tables, the row
+    itself and its archive files. Safe to re-run after an interruption. With
+    owner (see claim_next_deletion) each chunk renews the claim, and
+    PurgeClaimLost is raised if another run has taken it over.
+    """
+    chunk_size = chunk_size or current_app.config.get('DELETION_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+    
+    def record_progress(count):
+        query = Environment.query.filter_by(id=environment_id)
+        values = {Environment.deletion_done: Environment.deletion_done + count}
+        if owner:
+            query = query.filter_by(purge_owner=owner)
+            values[Environment.purge_lease_until] = datetime.utcnow() + timedelta(seconds=PURGE_LEASE_SECONDS)
+        if not query.update(values, synchronize_session=False) and owner:
+            raise PurgeClaimLost(environment_id)
+    
+    deleted = delete_in_chunks(environment_id, [WirelessScan.environment_id == environment_id], chunk_size,
+                               on_chunk=record_progress, pause=pause)
+    
+    archive_paths = [path for (path,) in db.session.query(ScanArchive.path).filter_by(environment_id=environment_id)]
+    
+    # ON DELETE CASCADE covers these, but databases created before the cascades still need explicit deletes
+    for model in (Upload, ScanArchive, SensorToken):
+        model.query.filter_by(environment_id=environment_id).delete(synchronize_session=False)
+    Environment.query.filter_by(id=environment_id).delete(synchronize_session=False)
+    db.session.commit()
+    
+    # Free this worker's copy now; other workers' copies can never match the id's next owner (see snapshot_version)
+    get_snapshot_cache().invalidate(environment_id)
+    remove_archive_files(archive_paths)
+    return deleted
+
+def purge_pending(chunk_size=None, pause=0):
+    """
+    Purge every environment marked for deletion that no other worker is
+    purging, oldest first, then reclaim space. Returns their ids.
+    """
+    owner = uuid.uuid4().hex
+    purged = []
+    engines = set()
+    while True:
+        environment_id = claim_next_deletion(owner)
+        if environment_id is None:
+            break
+        # The primary database, or the environment's (now empty, kept for reuse) shard file if it has one
+        engine = scan_engine(environment_id)
+        if engine is not None:
+            engines.add(engine)
+        try:
+            purge_environment(environment_id, chunk_size, pause, owner)
+        except PurgeClaimLost:
+            db.session.rollback()
+            current_app.logger.warning('Purge of environment %s was taken over by another worker', environment_id)
+            continue
+        purged.append(environment_id)
+    
+    for engine in engines:
+        reclaim_space(engine, pause=pause)
+    
+    return purged
+
+class EnvironmentPurger:
+    """
+    Background thread (one per worker process) that runs purge_pending
+    whenever an environment is marked for deletion. Work is claimed in the
+    database, so an interrupted purge is picked up once its claim expires by
+    the next wake() in any worker or by `flask purge-deleted`.
+    """
+    
+    def __init__(self, app, chunk_size=DEFAULT_CHUNK_SIZE, pause_ms=50):
+        self.app = app
+        self.chunk_size = chunk_size
+        self.pause = pause_ms / 1000.0
+        self._lock = threading.Lock()
+        self._requested = False
+        self._thread = None
+        self._pid = None
+    
+    def wake(self):
+        with self._lock:
+            self._requested = True
+            # Restarted after fork so each worker process owns its thread
+            if self._thread is None or not self._thread.is_alive() or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='environment-purger', daemon=True)
+                self._thread.start()
+    
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._requested:
+                    self._thread = None
+                    return
+                self._requested = False
+            
+            with self.app.app_context():
+                try:
+                    purge_pending(self.chunk_size, self.pause)
+                except Exception:
+                    db.session.rollback()
+                    self.app.logger.exception('Environment purge failed; it will resume on the next deletion or `flask purge-deleted`')
+                finally:
+                    db.session.remove()
+
+_purger_lock = threading.Lock()
+
+def get_purger():
+    """The current app's purger, created on first use"""
+    app = current_app._get_current_object()
+    with _purger_lock:
+        purger = app.extensions.get('environment_purger')
+        if purger is None:
+            purger = EnvironmentPurger(app, app.config['DELETION_CHUNK_SIZE'], app.config['DELETION_PAUSE_MS'])
+            app.extensions['environment_purger'] = purger
+    return purger
@@ -1,7 +1,7 @@
 from flask_wtf import FlaskForm
 from flask_wtf.file import FileField, FileRequired, FileAllowed
-from wtforms import StringField, PasswordField, TextAreaField, SubmitField, SelectField, HiddenField
-from wtforms.validators import DataRequired, Length, ValidationError
+from wtforms import StringField, PasswordField, TextAreaField, SubmitField, SelectField, SelectMultipleField, IntegerField
+from wtforms.validators import DataRequired, Length, NumberRange, Optional, ValidationError
 from .models import User, Environment
 
 class LoginForm(FlaskForm):
@@ -25,14 +25,14 @@ class EnvironmentForm(FlaskForm):
     
     def validate_name(self, name):
         from flask_login import current_user
-        environment = Environment.query.filter_by(name=name.data, created_by=current_user.id).first()
+        environment = Environment.active().filter_by(name=name.data, created_by=current_user.id).first()
         if environment:
             raise ValidationError('Environment name already exists. Please choose a different name.')
 
 class CSVUploadForm(FlaskForm):
     csv_file = FileField('CSV File', validators=[
         FileRequired(),
-        FileAllowed(['csv'], 'Only CSV files are allowed!')
+        FileAllowed(['csv', 'netxml', 'xml'], 'Only CSV (native, airodump-ng or Kismet) and Kismet NetXML files are allowed!')
     ])
     submit = SubmitField('Upload CSV')
 
@@ -40,15 +40,16 @@ class RemarksForm(FlaskForm):
     remarks = TextAreaField('Remarks', validators=[Length(max=1000)])
     submit = SubmitField('Update Remarks')
 
-class UserApprovalForm(FlaskForm):
-    user_id = HiddenField('User ID', validators=[DataRequired()])
-    submit = SubmitField('Approve')
+class RetentionPolicyForm(FlaskForm):
+    retention_days = IntegerField('Archive scans older than (days)', validators=[Optional(), NumberRange(min=1)])
+    idle_archive_days = IntegerField('Archive whole environment after idle (days)', validators=[Optional(), NumberRange(min=1)])
+    submit = SubmitField('Save Policy')
 
-class UserRejectionForm(FlaskForm):
-    user_id = HiddenField('User ID', validators=[DataRequired()])
-    submit = SubmitField('Reject')
+class SensorTokenForm(FlaskForm):
+    name = StringField('Sensor Name', validators=[DataRequired(), Length(min=1, max=100)])
+    submit = SubmitField('Create Token')
 
-class RoleAssignmentForm(FlaskForm):
-    user_id = HiddenField('User ID', validators=[DataRequired()])
-    role = SelectField('Role', choices=[('user', 'User'), ('admin', 'Admin')], validators=[DataRequired()])
-    submit = SubmitField('Update Role')
\ No newline at end of file
+class BulkUserActionForm(FlaskForm):
+    # Choices are the checkboxes rendered on the current page; ids are re-checked server side
+    user_ids = SelectMultipleField('Users', choices=[], coerce=int, validate_choice=False, validators=[DataRequired(message='Select at least one user.')])
+    role = SelectField('Role', choices=[('user', 'User'), ('admin', 'Admin')], default='user')
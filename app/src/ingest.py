@@ -0,0 +1,179 @@
+import atexit
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from flask import current_app
+from sqlalchemy.dialects import postgresql, sqlite
+from .models import Environment, WirelessScan, db
+from .parsers import SCAN_FIELDS
+from .validation import validate_record
+from .shards import commit_scan_session, scan_session
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FLUSH_MS = 250
+DEFAULT_MAX_PENDING = 50000
+MAX_FLUSH_ATTEMPTS = 3
+
+def parse_sensor_record(record, environment_id, user_id):
+    """
+    Validate one pushed scan record (same rules as CSV uploads).
+    Returns (row, None) with a dict ready for insert, or (None, error).
+    """
+    if not isinstance(record, dict):
+        return None, 'Record must be a JSON object'
+    
+    # JSON numbers and nulls become the text a CSV cell would hold
+    values, error = validate_record({field: '' if record.get(field) is None else str(record.get(field))
+                                     for field in SCAN_FIELDS})
+    if error:
+        kind, value = error
+        return None, f"{kind} '{value}'"
+    
+    bssid, ssid, quality, signal, channel, encryption, timestamp = values
+    return {
+        'environment_id': environment_id,
+        'bssid': bssid,
+        'ssid': ssid,
+        'quality': quality,
+        'signal': signal,
+        'channel': channel,
+        'encryption': encryption,
+        'timestamp': timestamp,
+        'rogue_ap_potential': False,
+        'uploaded_by': user_id,
+        'uploaded_at': datetime.utcnow()
+    }, None
+
+def insert_ignoring_duplicates(rows, session=None):
+    """Bulk insert scan rows in one statement, skipping (environment, bssid, ssid) duplicates"""
+    session = session or db.session
+    dialect = session.get_bind().dialect.name
+    index_elements = ['environment_id', 'bssid', 'ssid']
+    if dialect == 'sqlite':
+        statement = sqlite.insert(WirelessScan).on_conflict_do_nothing(index_elements=index_elements)
+    elif dialect == 'postgresql':
+        statement = postgresql.insert(WirelessScan).on_conflict_do_nothing(index_elements=index_elements)
+    else:
+        statement = db.insert(WirelessScan).prefix_with('IGNORE')
+    session.execute(statement, rows)
+
+class WriteBuffer:
+    """
+    In-process buffer that coalesces many small sensor pushes into one bulk
+    transaction every `batch_size` rows or `flush_ms` milliseconds. When more
+    than `max_pending` rows are waiting, `add` refuses new rows so callers can
+    apply backpressure. Buffered rows live in memory until flushed.
+    """
+    
+    def __init__(self, app, batch_size=DEFAULT_BATCH_SIZE, flush_ms=DEFAULT_FLUSH_MS, max_pending=DEFAULT_MAX_PENDING):
+        self.app = app
+        self.batch_size = batch_size
+        self.flush_interval = flush_ms / 1000.0
+        self.max_pending = max_pending
+        self._pending = deque()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._pid = None
+        self.stats = {'flushes': 0, 'rows_written': 0, 'rows_dropped': 0}
+        atexit.register(self.flush)
+    
+    def add(self, rows):
+        """Queue rows for the next flush. Returns False (nothing queued) when the buffer is full."""
+        with self._condition:
+            if len(self._pending) + len(rows) > self.max_pending:
+                return False
+            self._pending.extend(rows)
+            self._ensure_worker()
+            if len(self._pending) >= self.batch_size:
+                self._condition.notify()
+        return True
+    
+    def pending(self):
+        with self._condition:
+            return len(self._pending)
+    
+    def flush(self):
+        """Write every pending row now, in batch_size transactions"""
+        while True:
+            batch = self._take(self.batch_size)
+            if not batch:
+                return
+            self._write(batch)
+    
+    def _ensure_worker(self):
+        # Started lazily (and restarted after fork) so each worker process owns its flusher
+        if self._thread is None or not self._thread.is_alive() or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='ingest-flusher', daemon=True)
+            self._thread.start()
+    
+    def _take(self, limit):
+        with self._condition:
+            count = min(limit, len(self._pending))
+            return [self._pending.popleft() for _ in range(count)]
+    
+    def _run(self):
+        while True:
+            with self._condition:
+                if len(self._pending) < self.batch_size:
+                    self._condition.wait(self.flush_interval)
+            batch = self._take(self.batch_size)
+            if batch:
+                self._write(batch)
+    
+    def _write(self, batch):
+        with self.app.app_context():
+            try:
+                # Rows buffered for an environment deleted since the push would fail the whole batch
+                live_ids = {environment_id for (environment_id,) in Environment.active().with_entities(Environment.id)
+                            .filter(Environment.id.in_({row['environment_id'] for row in batch}))}
+                live_rows = [row for row in batch if row['environment_id'] in live_ids]
+                self.stats['rows_dropped'] += len(batch) - len(live_rows)
+                batch = live_rows
+                if not batch:
+                    return
+                
+                # One statement per session: a single one normally, one per environment shard when sharded
+                groups = {}
+                for row in batch:
+                    groups.setdefault(scan_session(row['environment_id'], create=True), []).append(row)
+                
+                for attempt in range(1, MAX_FLUSH_ATTEMPTS + 1):
+                    try:
+                        # Shards commit first; a retry after a failed primary commit re-inserts as no-ops
+                        for session, rows in groups.items():
+                            insert_ignoring_duplicates(rows, session)
+                            commit_scan_session(session)
+                        Environment.bump_data_version(row['environment_id'] for row in batch)
+                        db.session.commit()
+                        self.stats['flushes'] += 1
+                        self.stats['rows_written'] += len(batch)
+                        return
+                    except Exception:
+                        for session in groups:
+                            session.rollback()
+                        db.session.rollback()
+                        self.app.logger.exception('Sensor ingest flush failed (attempt %d/%d)', attempt, MAX_FLUSH_ATTEMPTS)
+                        time.sleep(self.flush_interval * attempt)
+                self.stats['rows_dropped'] += len(batch)
+            finally:
+                db.session.remove()
+
+_buffer_lock = threading.Lock()
+
+def get_write_buffer():
+    """The current app's write buffer, created on first use"""
+    app = current_app._get_current_object()
+    with _buffer_lock:
+        buffer = app.extensions.get('ingest_buffer')
+        if buffer is None:
+            buffer = WriteBuffer(
+                app,
+                batch_size=app.config.get('INGEST_BATCH_SIZE', DEFAULT_BATCH_SIZE),
+                flush_ms=app.config.get('INGEST_FLUSH_MS', DEFAULT_FLUSH_MS),
+                max_pending=app.config.get('INGEST_MAX_PENDING', DEFAULT_MAX_PENDING)
+            )
+            app.extensions['ingest_buffer'] = buffer
+    return buffer
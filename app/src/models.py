@@ -1,3 +1,5 @@
+import hashlib
+import secrets
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
@@ -17,6 +19,7 @@ class User(UserMixin, db.Model):
     # Relationships
     environments = db.relationship('Environment', backref='admin', lazy=True)
     wireless_scans = db.relationship('WirelessScan', backref='uploader', lazy=True)
+    uploads = db.relationship('Upload', backref='uploader', lazy=True)
     
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
@@ -35,11 +38,63 @@ class Environment(db.Model):
     created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    # Relationships
-    wireless_scans = db.relationship('WirelessScan', backref='environment', lazy=True, cascade='all, delete-orphan')
+    # Retention policy: archive scans older than N days / whole environment after N idle days
+    retention_days = db.Column(db.Integer)
+    idle_archive_days = db.Column(db.Integer)
+    
+    # Bumped whenever the environment's scans change; read caches compare against it
+    data_version = db.Column(db.Integer, default=0, nullable=False)
+    
+    # Set when an admin deletes the environment; its rows are then purged in the background
+    deleting_since = db.Column(db.DateTime, index=True)
+    deletion_total = db.Column(db.Integer)
+    deletion_done = db.Column(db.Integer, default=0, nullable=False)
+    # Claim of the purge run working on it, so two workers never purge the same environment
+    purge_owner = db.Column(db.String(32))
+    purge_lease_until = db.Column(db.DateTime)
+    
+    # Relationships (passive_deletes: children are removed by the database/purge, never loaded to be deleted)
+    wireless_scans = db.relationship('WirelessScan', backref='environment', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
+    uploads = db.relationship('Upload', backref='environment', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
+    archives = db.relationship('ScanArchive', backref='environment', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
+    sensor_tokens = db.relationship('SensorToken', backref='environment', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
+    
+    # Ensure environment names are unique per admin; one being deleted frees its name right away
+    __table_args__ = (
+        db.Index('_environment_live_name_uc', 'name', 'created_by', unique=True,
+                 sqlite_where=db.text('deleting_since IS NULL'), postgresql_where=db.text('deleting_since IS NULL')),
+    )
+    
+    @classmethod
+    def bump_data_version(cls, environment_ids):
+        """Mark environments' scans as changed (part of the caller's transaction)"""
+        environment_ids = {environment_id for environment_id in environment_ids if environment_id is not None}
+        if environment_ids:
+            cls.query.filter(cls.id.in_(environment_ids)) \
+                .update({cls.data_version: cls.data_version + 1}, synchronize_session=False)
+    
+    @property
+    def snapshot_version(self):
+        """
+        Version key for cached copies of the scans: data_version alone is not
+        enough because SQLite can hand a purged environment's id to a new one.
+        """
+        return (self.created_at, self.data_version)
+    
+    @classmethod
+    def active(cls):
+        """Query of environments that are not being deleted"""
+        return cls.query.filter(cls.deleting_since.is_(None))
+    
+    @classmethod
+    def get_active_or_404(cls, environment_id):
+        return cls.active().filter(cls.id == environment_id).first_or_404()
     
-    # Ensure environment names are unique per admin
-    __table_args__ = (db.UniqueConstraint('name', 'created_by', name='_environment_name_admin_uc'),)
+    @property
+    def deletion_percent(self):
+        if not self.deletion_total:
+            return 100 if self.deleting_since else 0
+        return min(100, int(self.deletion_done * 100 / self.deletion_total))
     
     def __repr__(self):
         return f'<Environment {self.name}>'
@@ -48,7 +103,7 @@ class WirelessScan(db.Model):
     __tablename__ = 'wireless_scans'
     
     id = db.Column(db.Integer, primary_key=True)
-    environment_id = db.Column(db.Integer, db.ForeignKey('environments.id'), nullable=False)
+    environment_id = db.Column(db.Integer, db.ForeignKey('environments.id', ondelete='CASCADE'), nullable=False)
     bssid = db.Column(db.String(17), nullable=False)  # MAC address format: AA:BB:CC:DD:EE:FF
     ssid = db.Column(db.String(32), nullable=False)   # SSID max length is 32 bytes
     quality = db.Column(db.Integer)
@@ -65,4 +120,74 @@ class WirelessScan(db.Model):
     __table_args__ = (db.UniqueConstraint('environment_id', 'bssid', 'ssid', name='_scan_dedup_uc'),)
     
     def __repr__(self):
-        return f'<WirelessScan {self.bssid} - {self.ssid}>'
\ No newline at end of file
+        return f'<WirelessScan {self.bssid} - {self.ssid}>'
+
+class Upload(db.Model):
+    __tablename__ = 'uploads'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    environment_id = db.Column(db.Integer, db.ForeignKey('environments.id', ondelete='CASCADE'), nullable=False)
+    uploaded_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    filename = db.Column(db.String(255))
+    digest = db.Column(db.String(64), nullable=False)  # SHA-256 of the raw file bytes
+    size_bytes = db.Column(db.Integer, default=0, nullable=False)
+    total_rows = db.Column(db.Integer, default=0, nullable=False)
+    inserted_rows = db.Column(db.Integer, default=0, nullable=False)
+    duplicate_rows = db.Column(db.Integer, default=0, nullable=False)
+    parse_ms = db.Column(db.Integer, default=0, nullable=False)
+    commit_ms = db.Column(db.Integer, default=0, nullable=False)
+    uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # A given file is only ingested once per environment
+    __table_args__ = (
+        db.UniqueConstraint('environment_id', 'digest', name='_upload_digest_uc'),
+        db.Index('ix_uploads_environment_uploaded_at', 'environment_id', 'uploaded_at'),
+    )
+    
+    def __repr__(self):
+        return f'<Upload {self.filename} ({self.digest[:12]})>'
+
+class ScanArchive(db.Model):
+    __tablename__ = 'scan_archives'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    environment_id = db.Column(db.Integer, db.ForeignKey('environments.id', ondelete='CASCADE'), nullable=False, index=True)
+    path = db.Column(db.String(500), nullable=False)  # gzip-compressed NDJSON, one scan per line
+    reason = db.Column(db.String(20), nullable=False)  # 'age' or 'idle'
+    scan_count = db.Column(db.Integer, default=0, nullable=False)
+    unique_networks = db.Column(db.Integer, default=0, nullable=False)
+    rogue_count = db.Column(db.Integer, default=0, nullable=False)
+    oldest_timestamp = db.Column(db.DateTime)
+    newest_timestamp = db.Column(db.DateTime)
+    size_bytes = db.Column(db.Integer, default=0, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ScanArchive {self.path} ({self.scan_count} scans)>'
+
+class SensorToken(db.Model):
+    __tablename__ = 'sensor_tokens'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    token_hash = db.Column(db.String(64), unique=True, nullable=False)  # SHA-256 of the bearer token; the token itself is never stored
+    environment_id = db.Column(db.Integer, db.ForeignKey('environments.id', ondelete='CASCADE'), nullable=False)
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)  # Pushed scans are attributed to this user
+    is_active = db.Column(db.Boolean, default=True, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_used_at = db.Column(db.DateTime)
+    
+    creator = db.relationship('User', lazy=True)
+    
+    @staticmethod
+    def hash_token(token):
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+    
+    @classmethod
+    def generate(cls, name, environment_id, created_by):
+        """Create a token row and return it with the plaintext token (shown once)"""
+        token = secrets.token_urlsafe(32)
+        return cls(name=name, token_hash=cls.hash_token(token), environment_id=environment_id, created_by=created_by), token
+    
+    def __repr__(self):
+        return f'<SensorToken {self.name}>'
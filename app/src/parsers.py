@@ -0,0 +1,195 @@
+import csv
+import io
+import xml.etree.ElementTree as ElementTree
+from datetime import datetime
+
+# Every parser yields records with these keys (string values, '' when unknown),
+# which then go through the same validation as native CSV rows.
+SCAN_FIELDS = ['bssid', 'ssid', 'quality', 'signal', 'channel', 'encryption', 'timestamp']
+
+# Bytes of the file handed to detect()
+HEAD_BYTES = 4096
+
+KISMET_TIME_FORMAT = '%a %b %d %H:%M:%S %Y'
+
+PARSERS = []
+
+class ScanFileError(Exception):
+    """Raised by a parser when a file cannot be read in its format"""
+
+def register_parser(parser_class):
+    """Class decorator adding a parser to the registry (checked in registration order)"""
+    PARSERS.append(parser_class())
+    return parser_class
+
+def detect_parser(head):
+    """Return the first registered parser that recognises the start of a file"""
+    for parser in PARSERS:
+        if parser.detect(head):
+            return parser
+    return None
+
+def quality_from_dbm(signal):
+    """Approximate 0-100 link quality from a dBm reading (-100 dBm -> 0, -50 dBm -> 100)"""
+    return max(0, min(100, 2 * (signal + 100)))
+
+def _text_stream(stream):
+    """
+    Decode a binary upload stream as UTF-8 text. Werkzeug buffers uploads in a
+    SpooledTemporaryFile, which only implements readable() etc. (needed by
+    TextIOWrapper) from Python 3.11, so older runtimes wrap its underlying file.
+    """
+    if not hasattr(stream, 'readable'):
+        stream = getattr(stream, '_file', None) or io.BytesIO(stream.read())
+    return io.TextIOWrapper(stream, encoding='utf-8', newline='')
+
+def _record(bssid, ssid, signal, channel, encryption, timestamp, quality=None):
+    """Build a record from native values, deriving quality from signal when missing"""
+    if quality is None and signal is not None:
+        quality = quality_from_dbm(signal)
+    return {
+        'bssid': bssid,
+        'ssid': ssid,
+        'quality': '' if quality is None else str(quality),
+        'signal': '' if signal is None else str(signal),
+        'channel': '' if channel is None else str(channel),
+        'encryption': encryption[:50],
+        'timestamp': timestamp
+    }
+
+def _int_or_none(value):
+    try:
+        return int(value.strip())
+    except (AttributeError, ValueError):
+        return None
+
+def _kismet_timestamp(value):
+    """Kismet writes ctime() style dates; normalise them to YYYY-MM-DD HH:MM:SS"""
+    try:
+        return datetime.strptime(value.strip(), KISMET_TIME_FORMAT).strftime('%Y-%m-%d %H:%M:%S')
+    except (AttributeError, ValueError):
+        return (value or '').strip()
+
+@register_parser
+class AirodumpCSVParser:
+    """airodump-ng CSV: an access point section followed by a station section"""
+    name = 'airodump-ng CSV'
+    
+    def detect(self, head):
+        return 'BSSID, First time seen, Last time seen' in head
+    
+    def iter_records(self, stream):
+        in_ap_section = False
+        for fields in csv.reader(_text_stream(stream), skipinitialspace=True):
+            if not fields or not fields[0].strip():
+                continue
+            first = fields[0].strip()
+            if first == 'BSSID':
+                in_ap_section = True
+                continue
+            if first == 'Station MAC':
+                # Client stations are not access points
+                return
+            if not in_ap_section or len(fields) < 14:
+                continue
+            
+            # ESSID is written unquoted, so commas in it spill into extra fields before Key
+            essid = ','.join(fields[13:-1]) if len(fields) > 15 else fields[13]
+            power = _int_or_none(fields[8])
+            privacy = fields[5].strip()
+            
+            yield _record(
+                bssid=first,
+                ssid=essid.strip(),
+                signal=power if power not in (None, -1) else None,
+                channel=_int_or_none(fields[3]),
+                encryption='Open' if privacy == 'OPN' else privacy,
+                timestamp=fields[2].strip()
+            )
+
+@register_parser
+class KismetCSVParser:
+    """Kismet (legacy) semicolon-separated network CSV"""
+    name = 'Kismet CSV'
+    
+    def detect(self, head):
+        return head.lstrip().startswith('Network;NetType;ESSID;BSSID')
+    
+    def iter_records(self, stream):
+        for row in csv.DictReader(_text_stream(stream), delimiter=';'):
+            if row.get('NetType', '').strip() == 'probe':
+                continue
+            signal = _int_or_none(row.get('BestSignal'))
+            quality = _int_or_none(row.get('BestQuality'))
+            encryption = (row.get('Encryption') or '').strip()
+            
+            yield _record(
+                bssid=(row.get('BSSID') or '').strip(),
+                ssid=(row.get('ESSID') or '').strip(),
+                signal=signal if signal else None,
+                channel=_int_or_none(row.get('Channel')),
+                encryption='Open' if encryption in ('', 'None') else encryption,
+                timestamp=_kismet_timestamp(row.get('LastTime')),
+                quality=quality if quality else None
+            )
+
+@register_parser
+class KismetNetXMLParser:
+    """Kismet .netxml detection run, streamed one wireless-network element at a time"""
+    name = 'Kismet NetXML'
+    
+    def detect(self, head):
+        return '<detection-run' in head
+    
+    def iter_records(self, stream):
+        try:
+            for _, element in ElementTree.iterparse(stream, events=('end',)):
+                if element.tag != 'wireless-network':
+                    continue
+                if element.get('type') != 'probe':
+                    yield self._network_record(element)
+                element.clear()
+        except ElementTree.ParseError as e:
+            raise ScanFileError(f'Invalid NetXML file: {str(e)}')
+    
+    def _network_record(self, network):
+        ssid_element = network.find('SSID')
+        essid = ''
+        encryptions = []
+        if ssid_element is not None:
+            essid = (ssid_element.findtext('essid') or '').strip()
+            for encryption in ssid_element.findall('encryption'):
+                if encryption.text and encryption.text.strip() not in encryptions:
+                    encryptions.append(encryption.text.strip())
+        
+        signal = _int_or_none(network.findtext('snr-info/max_signal_dbm'))
+        encryption = ' '.join(encryptions)
+        
+        return _record(
+            bssid=(network.findtext('BSSID') or '').strip(),
+            ssid=essid,
+            signal=signal if signal else None,
+            channel=_int_or_none(network.findtext('channel')),
+            encryption='Open' if encryption in ('', 'None') else encryption,
+            timestamp=_kismet_timestamp(network.get('last-time'))
+        )
+
+@register_parser
+class NativeCSVParser:
+    """The application's own seven-column CSV (fallback for anything else)"""
+    name = 'CSV'
+    
+    def detect(self, head):
+        return True
+    
+    def iter_records(self, stream):
+        reader = csv.DictReader(_text_stream(stream))
+        
+        if not reader.fieldnames:
+            raise ScanFileError('CSV file appears to be empty or invalid')
+        
+        missing_columns = set(SCAN_FIELDS) - set(reader.fieldnames)
+        if missing_columns:
+            raise ScanFileError(f"Missing required columns: {', '.join(missing_columns)}")
+        
+        yield from reader
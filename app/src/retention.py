@@ -0,0 +1,230 @@
+import gzip
+import json
+import os
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from flask import current_app
+from .models import Environment, WirelessScan, ScanArchive, db
+from .shards import commit_scan_session, scan_engine, scan_session
+
+# Columns written to archive files, in order
+ARCHIVE_COLUMNS = ['id', 'bssid', 'ssid', 'quality', 'signal', 'channel', 'encryption', 'timestamp',
+                   'remarks', 'rogue_ap_potential', 'uploaded_by', 'uploaded_at']
+
+# Read-only stand-in for WirelessScan rows that live in an archive file
+ArchivedScan = namedtuple('ArchivedScan', ARCHIVE_COLUMNS)
+
+DEFAULT_CHUNK_SIZE = 5000
+
+# Pages freed per incremental vacuum step (4MB with SQLite's default 4KB pages)
+DEFAULT_VACUUM_PAGES = 1000
+
+def apply_retention(environment=None, now=None):
+    """
+    Apply the retention policy of one environment (or all environments).
+    Returns a list of the ScanArchive rows created.
+    """
+    now = now or datetime.utcnow()
+    environments = [environment] if environment else Environment.active().all()
+    
+    archives = []
+    for env in environments:
+        if env.idle_archive_days:
+            last_activity = scan_session(env.id).query(db.func.max(WirelessScan.uploaded_at)) \
+                .filter(WirelessScan.environment_id == env.id).scalar()
+            if last_activity and last_activity < now - timedelta(days=env.idle_archive_days):
+                archive = archive_scans(env, cutoff=None, reason='idle')
+                if archive:
+                    archives.append(archive)
+                continue
+        
+        if env.retention_days:
+            archive = archive_scans(env, cutoff=now - timedelta(days=env.retention_days), reason='age')
+            if archive:
+                archives.append(archive)
+    
+    for engine in {scan_engine(archive.environment_id) for archive in archives} - {None}:
+        reclaim_space(engine)
+    
+    return archives
+
+def archive_scans(environment, cutoff=None, reason='age', chunk_size=None):
+    """
+    Move an environment's scans with a timestamp before cutoff (all scans if
+    cutoff is None) into a compressed archive file, leaving a ScanArchive
+    summary row behind. Rows are streamed out and deleted in bounded chunks.
+    """
+    chunk_size = chunk_size or current_app.config.get('RETENTION_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+    session = scan_session(environment.id)
+    
+    criteria = [WirelessScan.environment_id == environment.id]
+    if cutoff is not None:
+        criteria.append(WirelessScan.timestamp < cutoff)
+    
+    # Pin the upper id so scans uploaded while archiving are left alone
+    max_id = session.query(db.func.max(WirelessScan.id)).filter(*criteria).scalar()
+    if max_id is None:
+        return None
+    criteria.append(WirelessScan.id <= max_id)
+    
+    archive_dir = os.path.join(current_app.config['ARCHIVE_FOLDER'], str(environment.id))
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f'{datetime.utcnow().strftime("%Y%m%d%H%M%S%f")}_{reason}.ndjson.gz')
+    
+    scan_count = 0
+    rogue_count = 0
+    networks = set()
+    oldest = newest = None
+    columns = [getattr(WirelessScan, name) for name in ARCHIVE_COLUMNS]
+    
+    # Write the archive first; live rows are only removed once it is safely on disk
+    last_id = 0
+    with gzip.open(path, 'wt', encoding='utf-8') as archive_file:
+        while True:
+            rows = session.query(*columns).filter(*criteria, WirelessScan.id > last_id) \
+                .order_by(WirelessScan.id).limit(chunk_size).all()
+            if not rows:
+                break
+            
+            for row in rows:
+                record = dict(zip(ARCHIVE_COLUMNS, row))
+                record['timestamp'] = record['timestamp'].isoformat()
+                record['uploaded_at'] = record['uploaded_at'].isoformat() if record['uploaded_at'] else None
+                archive_file.write(json.dumps(record, separators=(',', ':')) + '\n')
+                
+                scan_count += 1
+                rogue_count += 1 if row.rogue_ap_potential else 0
+                networks.add((row.bssid, row.ssid))
+                oldest = row.timestamp if oldest is None else min(oldest, row.timestamp)
+                newest = row.timestamp if newest is None else max(newest, row.timestamp)
+            
+            last_id = rows[-1].id
+        
+        archive_file.flush()
+        os.fsync(archive_file.fileno())
+    
+    archive = ScanArchive(
+        environment_id=environment.id,
+        path=path,
+        reason=reason,
+        scan_count=scan_count,
+        unique_networks=len(networks),
+        rogue_count=rogue_count,
+        oldest_timestamp=oldest,
+        newest_timestamp=newest,
+        size_bytes=os.path.getsize(path)
+    )
+    
+    try:
+        db.session.add(archive)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        os.remove(path)
+        raise
+    
+    delete_in_chunks(environment.id, criteria, chunk_size)
+    return archive
+
+def delete_in_chunks(environment_id, criteria, chunk_size=DEFAULT_CHUNK_SIZE, on_chunk=None, pause=0):
+    """
+    Delete an environment's matching scans in short transactions so writers
+    are never blocked for long. on_chunk(count) runs in the primary session's
+    transaction for each chunk, after a shard's own commit; pause (seconds)
+    is slept between chunks to let other writers in.
+    """
+    session = scan_session(environment_id)
+    deleted = 0
+    while True:
+        chunk_ids = session.query(WirelessScan.id).filter(*criteria).limit(chunk_size).subquery()
+        count = session.query(WirelessScan).filter(WirelessScan.id.in_(db.select(chunk_ids.c.id))) \
+            .delete(synchronize_session=False)
+        commit_scan_session(session)
+        if count:
+            Environment.bump_data_version([environment_id])
+            if on_chunk:
+                on_chunk(count)
+        db.session.commit()
+        deleted += count
+        if count < chunk_size:
+            break
+        if pause:
+            time.sleep(pause)
+    return deleted
+
+def iter_archived_scans(environment_id, seen=None):
+    """
+    Yield ArchivedScan records for every archive file of an environment,
+    newest archive first. With seen (a set of (bssid, ssid) keys, updated in
+    place) a network is yielded only once, from its most recent archive, and
+    never if it is already in seen, e.g. because it was uploaded again after
+    being archived.
+    """
+    archives = ScanArchive.query.filter_by(environment_id=environment_id).order_by(ScanArchive.id.desc()).all()
+    for archive in archives:
+        if not os.path.exists(archive.path):
+            current_app.logger.warning('Archive file missing: %s', archive.path)
+            continue
+        with gzip.open(archive.path, 'rt', encoding='utf-8') as archive_file:
+            for line in archive_file:
+                record = json.loads(line)
+                if seen is not None:
+                    key = (record['bssid'], record['ssid'])
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                record['timestamp'] = datetime.fromisoformat(record['timestamp'])
+                record['uploaded_at'] = datetime.fromisoformat(record['uploaded_at']) if record['uploaded_at'] else None
+                yield ArchivedScan(**record)
+
+def remove_archive_files(paths):
+    """Delete archive files from disk, ignoring ones already gone"""
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def enable_incremental_vacuum(engine=None):
+    """
+    Switch a SQLite database to incremental auto-vacuum so reclaim_space can
+    free pages in small steps. Unless the database is already in that mode
+    this rewrites the whole file (one VACUUM, holding the write lock), so it
+    runs from `flask init-db` before any worker starts.
+    """
+    engine = engine or db.engine
+    if engine.dialect.name != 'sqlite':
+        return
+    
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        if conn.exec_driver_sql('PRAGMA auto_vacuum').scalar() != 2:  # INCREMENTAL
+            conn.exec_driver_sql('PRAGMA auto_vacuum = INCREMENTAL')
+            conn.exec_driver_sql('VACUUM')
+
+def reclaim_space(engine=None, pages=DEFAULT_VACUUM_PAGES, pause=0):
+    """
+    Return freed pages to the filesystem with SQLite incremental vacuum, at
+    most `pages` pages per write transaction and `pause` seconds apart so
+    writers are only locked out briefly. Databases not in incremental
+    auto-vacuum mode (see enable_incremental_vacuum) are left as they are.
+    The WAL is checkpointed afterwards.
+    """
+    engine = engine or db.engine
+    if engine.dialect.name != 'sqlite':
+        return
+    
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        if conn.exec_driver_sql('PRAGMA auto_vacuum').scalar() == 2:  # INCREMENTAL
+            free = conn.exec_driver_sql('PRAGMA freelist_count').scalar()
+            while free:
+                # The pragma frees one page per step; executescript steps it to completion
+                conn.connection.driver_connection.executescript(f'PRAGMA incremental_vacuum({int(pages)})')
+                remaining = conn.exec_driver_sql('PRAGMA freelist_count').scalar()
+                if remaining >= free:
+                    break
+                free = remaining
+                if free and pause:
+                    time.sleep(pause)
+        # In WAL mode the file only shrinks once the log is checkpointed; TRUNCATE also empties the log
+        conn.exec_driver_sql('PRAGMA wal_checkpoint(TRUNCATE)')
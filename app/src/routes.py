@@ -1,11 +1,17 @@
 import os
+import time
 from datetime import datetime
-from flask import Blueprint, render_template, request, flash, redirect, url_for, current_app, jsonify, make_response
+from flask import Blueprint, abort, render_template, request, flash, redirect, url_for, current_app, jsonify, make_response, send_from_directory
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
-from .models import User, Environment, WirelessScan, db
-from .forms import EnvironmentForm, CSVUploadForm, RemarksForm, UserApprovalForm, UserRejectionForm, RoleAssignmentForm
-from .utils import parse_csv_data, format_file_size
+from .models import User, Environment, WirelessScan, Upload, ScanArchive, SensorToken, db
+from .forms import EnvironmentForm, CSVUploadForm, RemarksForm, BulkUserActionForm, RetentionPolicyForm, SensorTokenForm
+from .utils import parse_scan_file, compute_digest, format_file_size
+from .validation import RejectFile
+from .retention import iter_archived_scans
+from .deletion import mark_for_deletion, get_purger
+from .snapshot import SORT_COLUMNS, get_snapshot_cache
+from .shards import commit_scan_session, fan_out, scan_session, scan_session_for_id, sessions_for_scan_ids
 
 main = Blueprint('main', __name__)
 
@@ -19,30 +25,55 @@ def index():
 @login_required
 def environments():
     if current_user.is_admin:
-        environments = Environment.query.all()
+        environments = Environment.active().all()
     else:
         # Regular users can only see environments they have access to
         # For now, show all environments, but could be restricted based on permissions
-        environments = Environment.query.all()
+        environments = Environment.active().all()
     
-    # Calculate statistics for each environment
+    # Environments being deleted are hidden; admins see the purge progress instead
+    deleting = Environment.query.filter(Environment.deleting_since.isnot(None)).order_by(Environment.deleting_since).all() \
+        if current_user.is_admin else []
+    
+    # Statistics come from cached snapshots where current; the rest from grouped aggregates
+    cache = get_snapshot_cache()
     env_stats = {}
+    uncached = []
     for env in environments:
-        scans = WirelessScan.query.filter_by(environment_id=env.id).all()
-        total_scans = len(scans)
-        unique_networks = len(set((scan.bssid, scan.ssid) for scan in scans))
-        
-        # Get most recent upload date
-        latest_upload = WirelessScan.query.filter_by(environment_id=env.id).order_by(WirelessScan.uploaded_at.desc()).first()
-        last_update = latest_upload.uploaded_at if latest_upload else None
-        
+        snapshot = cache.peek(env.id, env.snapshot_version)
+        if snapshot is None:
+            uncached.append(env.id)
+            continue
         env_stats[env.id] = {
-            'total_scans': total_scans,
-            'unique_networks': unique_networks,
-            'last_update': last_update
+            'total_scans': len(snapshot),
+            'unique_networks': snapshot.unique_networks,
+            'last_update': snapshot.last_upload
         }
     
-    return render_template('main/environments.html', environments=environments, env_stats=env_stats)
+    # Fanned out over the shards when sharding is on
+    for results in fan_out(_environment_scan_stats, uncached):
+        for environment_id, total_scans, unique_networks, last_update in results:
+            env_stats[environment_id] = {
+                'total_scans': total_scans,
+                'unique_networks': unique_networks,
+                'last_update': last_update
+            }
+    for environment_id in uncached:
+        env_stats.setdefault(environment_id, {'total_scans': 0, 'unique_networks': 0, 'last_update': None})
+    
+    return render_template('main/environments.html', environments=environments, env_stats=env_stats, deleting=deleting)
+
+def _environment_scan_stats(session, environment_ids):
+    """(environment_id, total_scans, unique_networks, last_update) for each of the environments that has scans"""
+    networks = session.query(WirelessScan.environment_id, WirelessScan.bssid, WirelessScan.ssid) \
+        .filter(WirelessScan.environment_id.in_(environment_ids)).distinct().subquery()
+    unique_counts = dict(session.query(networks.c.environment_id, db.func.count())
+                         .group_by(networks.c.environment_id).all())
+    totals = session.query(WirelessScan.environment_id, db.func.count(WirelessScan.id),
+                           db.func.max(WirelessScan.uploaded_at)) \
+        .filter(WirelessScan.environment_id.in_(environment_ids)).group_by(WirelessScan.environment_id).all()
+    return [(environment_id, total_scans, unique_counts.get(environment_id, 0), last_update)
+            for environment_id, total_scans, last_update in totals]
 
 @main.route('/environment/new', methods=['GET', 'POST'])
 @login_required
@@ -72,62 +103,194 @@ def new_environment():
 @main.route('/environment/<int:environment_id>')
 @login_required
 def environment_detail(environment_id):
-    environment = Environment.query.get_or_404(environment_id)
-    scans = WirelessScan.query.filter_by(environment_id=environment_id).order_by(WirelessScan.timestamp.desc()).all()
+    environment = Environment.get_active_or_404(environment_id)
+    return _render_environment_detail(environment)
+
+def _render_environment_detail(environment, **context):
+    environment_id = environment.id
+    snapshot = get_snapshot_cache().get(environment_id)
+    
+    # Optional server-side ordering/filtering, applied to the cached columns
+    sort = request.args.get('sort', 'timestamp')
+    if sort not in SORT_COLUMNS:
+        sort = 'timestamp'
+    descending = request.args.get('order', 'desc') != 'asc'
+    rogue = {'yes': True, 'no': False}.get(request.args.get('rogue'))
+    scans = list(snapshot.rows(snapshot.indices(sort, descending, rogue)))
     
     # Get scan statistics
-    total_scans = len(scans)
-    unique_networks = len(set((scan.bssid, scan.ssid) for scan in scans))
-    recent_uploads = WirelessScan.query.filter_by(environment_id=environment_id).order_by(WirelessScan.uploaded_at.desc()).limit(5).all()
+    total_scans = len(snapshot)
+    unique_networks = snapshot.unique_networks
+    recent_uploads = Upload.query.filter_by(environment_id=environment_id).order_by(Upload.uploaded_at.desc()).limit(5).all()
+    archives = ScanArchive.query.filter_by(environment_id=environment_id).order_by(ScanArchive.created_at.desc()).all()
+    archived_scans = sum(archive.scan_count for archive in archives)
+    
+    retention_form = RetentionPolicyForm(obj=environment)
+    sensor_tokens = SensorToken.query.filter_by(environment_id=environment_id).order_by(SensorToken.created_at.desc()).all() if current_user.is_admin else []
     
     return render_template('main/environment_detail.html', 
                          environment=environment, 
                          scans=scans,
                          total_scans=total_scans,
                          unique_networks=unique_networks,
-                         recent_uploads=recent_uploads)
+                         recent_uploads=recent_uploads,
+                         archives=archives,
+                         archived_scans=archived_scans,
+                         retention_form=retention_form,
+                         sensor_tokens=sensor_tokens,
+                         sensor_token_form=SensorTokenForm(formdata=None),
+                         **context)
+
+@main.route('/environment/<int:environment_id>/retention', methods=['POST'])
+@login_required
+def update_retention_policy(environment_id):
+    if not current_user.is_admin:
+        flash('Only administrators can change retention policies.', 'danger')
+        return redirect(url_for('main.environment_detail', environment_id=environment_id))
+    
+    environment = Environment.get_active_or_404(environment_id)
+    form = RetentionPolicyForm()
+    
+    if form.validate_on_submit():
+        environment.retention_days = form.retention_days.data
+        environment.idle_archive_days = form.idle_archive_days.data
+        
+        try:
+            db.session.commit()
+            flash('Retention policy updated successfully!', 'success')
+        except Exception as e:
+            db.session.rollback()
+            flash('Error updating retention policy. Please try again.', 'danger')
+    else:
+        flash('Invalid retention policy. Values must be whole numbers of days.', 'danger')
+    
+    return redirect(url_for('main.environment_detail', environment_id=environment_id))
+
+@main.route('/environment/<int:environment_id>/sensor_tokens', methods=['POST'])
+@login_required
+def create_sensor_token(environment_id):
+    if not current_user.is_admin:
+        flash('Only administrators can create sensor tokens.', 'danger')
+        return redirect(url_for('main.environment_detail', environment_id=environment_id))
+    
+    environment = Environment.get_active_or_404(environment_id)
+    form = SensorTokenForm()
+    
+    if form.validate_on_submit():
+        sensor_token, token = SensorToken.generate(form.name.data, environment.id, current_user.id)
+        
+        try:
+            db.session.add(sensor_token)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            flash('Error creating sensor token. Please try again.', 'danger')
+            return redirect(url_for('main.environment_detail', environment_id=environment_id))
+        
+        # Shown once in this response only: flashing it would store it in the session cookie
+        response = make_response(_render_environment_detail(environment, new_sensor_token=token,
+                                                            new_sensor_token_name=sensor_token.name))
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+    else:
+        flash('Invalid form submission.', 'danger')
+    
+    return redirect(url_for('main.environment_detail', environment_id=environment_id))
+
+@main.route('/sensor_token/<int:token_id>/revoke', methods=['POST'])
+@login_required
+def revoke_sensor_token(token_id):
+    sensor_token = SensorToken.query.get_or_404(token_id)
+    if not current_user.is_admin:
+        flash('Only administrators can revoke sensor tokens.', 'danger')
+        return redirect(url_for('main.environment_detail', environment_id=sensor_token.environment_id))
+    
+    sensor_token.is_active = False
+    
+    try:
+        db.session.commit()
+        flash(f'Sensor token "{sensor_token.name}" revoked.', 'success')
+    except Exception as e:
+        db.session.rollback()
+        flash('Error revoking sensor token. Please try again.', 'danger')
+    
+    return redirect(url_for('main.environment_detail', environment_id=sensor_token.environment_id))
 
 @main.route('/environment/<int:environment_id>/upload', methods=['GET', 'POST'])
 @login_required
 def upload_csv(environment_id):
-    environment = Environment.query.get_or_404(environment_id)
+    environment = Environment.get_active_or_404(environment_id)
     form = CSVUploadForm()
     
     if form.validate_on_submit():
         file = form.csv_file.data
         
         try:
-            # Read file content
-            file_content = file.read().decode('utf-8')
+            digest, size_bytes = compute_digest(file.stream)
             
-            # Parse CSV data
-            scans, errors, duplicates = parse_csv_data(file_content, environment_id, current_user.id)
+            # Identical file already ingested into this environment: skip parsing entirely
+            previous = Upload.query.filter_by(environment_id=environment_id, digest=digest).first()
+            if previous:
+                flash(f'This file was already uploaded on {previous.uploaded_at.strftime("%Y-%m-%d %H:%M")} '
+                      f'by {previous.uploader.username}. No new scans to upload.', 'info')
+                return redirect(url_for('main.environment_detail', environment_id=environment_id))
+            
+            # Detect the capture format and stream records through validation
+            parse_started = time.perf_counter()
+            rejects = RejectFile(_reject_folder(environment_id))
+            scans, errors, duplicates, file_format = parse_scan_file(file.stream, environment_id, current_user.id, rejects)
+            parse_ms = int((time.perf_counter() - parse_started) * 1000)
             
             if errors:
-                for error in errors:
-                    flash(error, 'danger')
+                # One flash for the whole upload; the per-kind breakdown is rendered in the page, not the session cookie
+                flash(f'Upload rejected: {errors.total} invalid row(s) or file error(s). Fix them and upload again.', 'danger')
+                return render_template('main/upload_csv.html', form=form, environment=environment,
+                                       error_summary=errors, reject_file=rejects.filename)
+            
+            if not scans and not duplicates:
+                flash('No valid scan data found in the uploaded file.', 'warning')
+                return render_template('main/upload_csv.html', form=form, environment=environment)
+            
+            upload = Upload(
+                environment_id=environment_id,
+                uploaded_by=current_user.id,
+                filename=secure_filename(file.filename or '') or None,
+                digest=digest,
+                size_bytes=size_bytes,
+                total_rows=len(scans) + duplicates,
+                inserted_rows=len(scans),
+                duplicate_rows=duplicates,
+                parse_ms=parse_ms
+            )
+            
+            # Save valid scans and the ledger entry in one transaction; when sharded the scans are
+            # committed to their shard first and the ledger/version follow in a short primary transaction
+            session = scan_session(environment_id, create=True)
+            try:
+                commit_started = time.perf_counter()
+                session.add_all(scans)
+                session.flush()
+                commit_scan_session(session)
+                # Time spent writing the scans, stored with the ledger row in the same commit
+                upload.commit_ms = int((time.perf_counter() - commit_started) * 1000)
+                db.session.add(upload)
+                Environment.bump_data_version([environment_id])
+                db.session.commit()
+            except Exception as e:
+                session.rollback()
+                db.session.rollback()
+                flash('Error saving scan data to database. Please try again.', 'danger')
                 return render_template('main/upload_csv.html', form=form, environment=environment)
             
-            # Save valid scans to database
             if scans:
-                try:
-                    db.session.add_all(scans)
-                    db.session.commit()
-                    
-                    success_msg = f'Successfully uploaded {len(scans)} new scan(s).'
-                    if duplicates > 0:
-                        success_msg += f' Skipped {duplicates} duplicate(s).'
-                    flash(success_msg, 'success')
-                    
-                    return redirect(url_for('main.environment_detail', environment_id=environment_id))
-                except Exception as e:
-                    db.session.rollback()
-                    flash('Error saving scan data to database. Please try again.', 'danger')
-            else:
+                success_msg = f'Successfully uploaded {len(scans)} new scan(s) from {file_format} file.'
                 if duplicates > 0:
-                    flash(f'No new scans to upload. All {duplicates} scans were duplicates.', 'info')
-                else:
-                    flash('No valid scan data found in the uploaded file.', 'warning')
+                    success_msg += f' Skipped {duplicates} duplicate(s).'
+                flash(success_msg, 'success')
+            else:
+                flash(f'No new scans to upload. All {duplicates} scans were duplicates.', 'info')
+            
+            return redirect(url_for('main.environment_detail', environment_id=environment_id))
                     
         except UnicodeDecodeError:
             flash('Error reading file. Please ensure it is a valid UTF-8 encoded CSV file.', 'danger')
@@ -136,26 +299,50 @@ def upload_csv(environment_id):
     
     return render_template('main/upload_csv.html', form=form, environment=environment)
 
+def _reject_folder(environment_id):
+    return os.path.join(os.path.abspath(current_app.config['UPLOAD_FOLDER']), 'rejects', str(environment_id))
+
+@main.route('/environment/<int:environment_id>/rejects/<filename>')
+@login_required
+def download_rejects(environment_id, filename):
+    Environment.get_active_or_404(environment_id)
+    return send_from_directory(_reject_folder(environment_id), secure_filename(filename),
+                               as_attachment=True, mimetype='text/csv')
+
 @main.route('/scan/<int:scan_id>/remarks', methods=['GET', 'POST'])
 @login_required
 def edit_remarks(scan_id):
-    scan = WirelessScan.query.get_or_404(scan_id)
+    session, scan = _get_scan_or_404(scan_id)
+    environment = Environment.get_active_or_404(scan.environment_id)
     form = RemarksForm()
     
     if form.validate_on_submit():
         scan.remarks = form.remarks.data
         try:
+            commit_scan_session(session)
+            Environment.bump_data_version([scan.environment_id])
             db.session.commit()
             flash('Remarks updated successfully!', 'success')
             return redirect(url_for('main.environment_detail', environment_id=scan.environment_id))
         except Exception as e:
+            session.rollback()
             db.session.rollback()
             flash('Error updating remarks. Please try again.', 'danger')
     
     if request.method == 'GET':
         form.remarks.data = scan.remarks
     
-    return render_template('main/edit_remarks.html', form=form, scan=scan)
+    # Looked up in the primary database: scans may live in a shard
+    uploader = db.session.get(User, scan.uploaded_by)
+    return render_template('main/edit_remarks.html', form=form, scan=scan, environment=environment, uploader=uploader)
+
+def _get_scan_or_404(scan_id):
+    """The session holding a scan, and the scan itself"""
+    session = scan_session_for_id(scan_id)
+    scan = session.get(WirelessScan, scan_id)
+    if scan is None:
+        abort(404)
+    return session, scan
 
 @main.route('/environment/<int:environment_id>/delete', methods=['POST'])
 @login_required
@@ -164,18 +351,49 @@ def delete_environment(environment_id):
         flash('Only administrators can delete environments.', 'danger')
         return redirect(url_for('main.environments'))
     
-    environment = Environment.query.get_or_404(environment_id)
+    environment = Environment.get_active_or_404(environment_id)
     
+    # Hide it now; scans are removed in chunks by the background purger
     try:
-        db.session.delete(environment)
+        mark_for_deletion(environment)
         db.session.commit()
-        flash(f'Environment "{environment.name}" deleted successfully!', 'success')
+        get_purger().wake()
+        flash(f'Environment "{environment.name}" is being deleted. Its {environment.deletion_total} scan(s) are removed in the background.', 'success')
     except Exception as e:
         db.session.rollback()
         flash('Error deleting environment. Please try again.', 'danger')
     
     return redirect(url_for('main.environments'))
 
+@main.route('/environment/<int:environment_id>/deletion')
+@login_required
+def deletion_status(environment_id):
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'error': 'Administrator access required.'}), 403
+    
+    environment = db.session.get(Environment, environment_id)
+    if environment is None:
+        return jsonify({'success': True, 'status': 'deleted', 'percent': 100})
+    if environment.deleting_since is None:
+        return jsonify({'success': True, 'status': 'active', 'percent': 0})
+    return jsonify({
+        'success': True,
+        'status': 'deleting',
+        'deleted': environment.deletion_done,
+        'total': environment.deletion_total,
+        'percent': environment.deletion_percent
+    })
+
+def _scan_count(session, environment_ids):
+    return session.query(db.func.count(WirelessScan.id)).filter(WirelessScan.environment_id.in_(environment_ids)).scalar()
+
+USERS_PER_PAGE = 50
+MAX_USERS_PER_PAGE = 200
+
+def _dashboard_args():
+    """Search/filter/page arguments to carry across dashboard redirects"""
+    return {key: value for key, value in request.args.items() if key in ('q', 'status', 'page', 'per_page') and value}
+
 @main.route('/admin/dashboard')
 @login_required
 def admin_dashboard():
@@ -183,125 +401,148 @@ def admin_dashboard():
         flash('Administrator access required.', 'danger')
         return redirect(url_for('main.environments'))
     
-    pending_users = User.query.filter_by(is_approved=False, is_admin=False).all()
-    all_users = User.query.all()
-    total_environments = Environment.query.count()
-    total_scans = WirelessScan.query.count()
+    search = request.args.get('q', '').strip()
+    status = request.args.get('status', '')
+    page = request.args.get('page', 1, type=int)
+    per_page = min(max(request.args.get('per_page', USERS_PER_PAGE, type=int), 1), MAX_USERS_PER_PAGE)
+    
+    # User and environment counters in a single round trip
+    pending_filter = db.and_(User.is_approved.is_(False), User.is_admin.is_(False))
+    total_users, pending_count, total_environments = db.session.query(
+        db.func.count(User.id),
+        db.func.coalesce(db.func.sum(db.case((pending_filter, 1), else_=0)), 0),
+        db.select(db.func.count(Environment.id)).where(Environment.deleting_since.is_(None)).scalar_subquery()
+    ).one()
     
-    # Create forms for each user
-    approval_forms = {}
-    rejection_forms = {}
-    role_forms = {}
+    # Scans are counted wherever they live (fanned out over the shards when sharding is on)
+    environment_ids = [environment_id for (environment_id,) in Environment.active().with_entities(Environment.id)]
+    total_scans = sum(fan_out(_scan_count, environment_ids))
     
-    for user in pending_users:
-        approval_forms[user.id] = UserApprovalForm()
-        rejection_forms[user.id] = UserRejectionForm()
-        approval_forms[user.id].user_id.data = user.id
-        rejection_forms[user.id].user_id.data = user.id
+    users_query = User.query
+    if search:
+        users_query = users_query.filter(db.func.lower(User.username).contains(search.lower(), autoescape=True))
+    if status == 'pending':
+        users_query = users_query.filter(pending_filter)
+    elif status == 'approved':
+        users_query = users_query.filter(User.is_approved.is_(True))
+    elif status == 'admin':
+        users_query = users_query.filter(User.is_admin.is_(True))
     
-    for user in all_users:
-        if user.id != current_user.id:  # Don't allow changing own role
-            role_forms[user.id] = RoleAssignmentForm()
-            role_forms[user.id].user_id.data = user.id
-            role_forms[user.id].role.data = 'admin' if user.is_admin else 'user'
+    pagination = users_query.order_by(User.created_at.desc(), User.id.desc()).paginate(page=page, per_page=per_page, error_out=False)
+    
+    # Scan counts for the visible page only
+    page_user_ids = [user.id for user in pagination.items]
+    scan_counts = {}
+    if page_user_ids:
+        def uploader_counts(session, environment_ids):
+            return session.query(WirelessScan.uploaded_by, db.func.count(WirelessScan.id)) \
+                .filter(WirelessScan.environment_id.in_(environment_ids), WirelessScan.uploaded_by.in_(page_user_ids)) \
+                .group_by(WirelessScan.uploaded_by).all()
+        
+        for rows in fan_out(uploader_counts, environment_ids):
+            for user_id, count in rows:
+                scan_counts[user_id] = scan_counts.get(user_id, 0) + count
     
     return render_template('main/admin_dashboard.html', 
-                         pending_users=pending_users,
-                         all_users=all_users,
+                         users=pagination.items,
+                         pagination=pagination,
+                         search=search,
+                         status=status,
+                         per_page=per_page,
+                         total_users=total_users,
+                         pending_count=pending_count,
                          total_environments=total_environments,
                          total_scans=total_scans,
-                         approval_forms=approval_forms,
-                         rejection_forms=rejection_forms,
-                         role_forms=role_forms)
+                         scan_counts=scan_counts,
+                         bulk_form=BulkUserActionForm())
+
+def _bulk_selected_user_ids(form):
+    """Selected user ids from a bulk form, never including the acting admin"""
+    return sorted({user_id for user_id in form.user_ids.data if user_id != current_user.id})
 
-@main.route('/admin/approve_user', methods=['POST'])
+@main.route('/admin/users/bulk_approve', methods=['POST'])
 @login_required
-def approve_user():
+def bulk_approve_users():
     if not current_user.is_admin:
         flash('Administrator access required.', 'danger')
         return redirect(url_for('main.environments'))
     
-    form = UserApprovalForm()
+    form = BulkUserActionForm()
     if form.validate_on_submit():
-        user = User.query.get_or_404(form.user_id.data)
-        user.is_approved = True
+        user_ids = _bulk_selected_user_ids(form)
         
         try:
+            updated = User.query.filter(User.id.in_(user_ids), User.is_approved.is_(False)) \
+                .update({User.is_approved: True}, synchronize_session=False)
             db.session.commit()
-            flash(f'User "{user.username}" approved successfully!', 'success')
+            flash(f'Approved {updated} user(s).', 'success')
         except Exception as e:
             db.session.rollback()
-            flash('Error approving user. Please try again.', 'danger')
+            flash('Error approving users. Please try again.', 'danger')
     else:
-        flash('Invalid form submission.', 'danger')
+        flash('Invalid form submission. Select at least one user.', 'danger')
     
-    return redirect(url_for('main.admin_dashboard'))
+    return redirect(url_for('main.admin_dashboard', **_dashboard_args()))
 
-@main.route('/admin/reject_user', methods=['POST'])
+@main.route('/admin/users/bulk_reject', methods=['POST'])
 @login_required
-def reject_user():
+def bulk_reject_users():
     if not current_user.is_admin:
         flash('Administrator access required.', 'danger')
         return redirect(url_for('main.environments'))
     
-    form = UserRejectionForm()
+    form = BulkUserActionForm()
     if form.validate_on_submit():
-        user = User.query.get_or_404(form.user_id.data)
-        username = user.username  # Store username before deletion
+        user_ids = _bulk_selected_user_ids(form)
         
+        # Only pending accounts can be rejected; they own no environments or scans
         try:
-            db.session.delete(user)
+            deleted = User.query.filter(User.id.in_(user_ids), User.is_approved.is_(False), User.is_admin.is_(False)) \
+                .delete(synchronize_session=False)
             db.session.commit()
-            flash(f'User "{username}" rejected and removed.', 'success')
+            flash(f'Rejected and removed {deleted} pending user(s).', 'success')
         except Exception as e:
             db.session.rollback()
-            flash('Error rejecting user. Please try again.', 'danger')
+            flash('Error rejecting users. Please try again.', 'danger')
     else:
-        flash('Invalid form submission.', 'danger')
+        flash('Invalid form submission. Select at least one user.', 'danger')
     
-    return redirect(url_for('main.admin_dashboard'))
+    return redirect(url_for('main.admin_dashboard', **_dashboard_args()))
 
-@main.route('/admin/assign_role', methods=['POST'])
+@main.route('/admin/users/bulk_role', methods=['POST'])
 @login_required
-def assign_role():
+def bulk_assign_role():
     if not current_user.is_admin:
         flash('Administrator access required.', 'danger')
         return redirect(url_for('main.environments'))
     
-    form = RoleAssignmentForm()
+    form = BulkUserActionForm()
     if form.validate_on_submit():
-        user = User.query.get_or_404(form.user_id.data)
+        user_ids = _bulk_selected_user_ids(form)
+        make_admin = form.role.data == 'admin'
         
-        # Prevent changing own role
-        if user.id == current_user.id:
-            flash('You cannot change your own role.', 'danger')
-            return redirect(url_for('main.admin_dashboard'))
-        
-        # Check if we're trying to demote the last admin
-        if user.is_admin and form.role.data == 'user':
-            admin_count = User.query.filter_by(is_admin=True).count()
-            if admin_count <= 1:
+        if not make_admin:
+            # There must be at least one admin left outside the selection
+            remaining_admins = User.query.filter(User.is_admin.is_(True), User.id.notin_(user_ids)).count()
+            if remaining_admins < 1:
                 flash('Cannot demote the last admin user. There must be at least one admin.', 'danger')
-                return redirect(url_for('main.admin_dashboard'))
-        
-        # Update user role
-        user.is_admin = (form.role.data == 'admin')
+                return redirect(url_for('main.admin_dashboard', **_dashboard_args()))
         
-        # If promoting to admin, ensure they are approved
-        if user.is_admin and not user.is_approved:
-            user.is_approved = True
+        # Promoted admins are approved at the same time
+        values = {User.is_admin: True, User.is_approved: True} if make_admin else {User.is_admin: False}
         
         try:
+            updated = User.query.filter(User.id.in_(user_ids)).update(values, synchronize_session=False)
             db.session.commit()
-            role_name = 'Admin' if user.is_admin else 'User'
-            flash(f'User "{user.username}" role updated to {role_name} successfully!', 'success')
+            role_name = 'Admin' if make_admin else 'User'
+            flash(f'Updated {updated} user(s) to {role_name}.', 'success')
         except Exception as e:
             db.session.rollback()
-            flash('Error updating user role. Please try again.', 'danger')
+            flash('Error updating user roles. Please try again.', 'danger')
     else:
-        flash('Invalid form submission.', 'danger')
+        flash('Invalid form submission. Select at least one user.', 'danger')
     
-    return redirect(url_for('main.admin_dashboard'))
+    return redirect(url_for('main.admin_dashboard', **_dashboard_args()))
 
 @main.route('/update_rogue_status', methods=['POST'])
 @login_required
@@ -311,12 +552,15 @@ def update_rogue_status():
         scan_id = data.get('scan_id')
         rogue_ap_potential = data.get('rogue_ap_potential')
         
-        scan = WirelessScan.query.get_or_404(scan_id)
+        session, scan = _get_scan_or_404(scan_id)
         scan.rogue_ap_potential = rogue_ap_potential
         
+        commit_scan_session(session)
+        Environment.bump_data_version([scan.environment_id])
         db.session.commit()
         return jsonify({'success': True})
     except Exception as e:
+        # Uncommitted shard sessions are discarded at teardown
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)})
 
@@ -327,14 +571,25 @@ def bulk_update_rogue_status():
         data = request.get_json()
         scan_ids = data.get('scan_ids', [])
         rogue_ap_potential = data.get('rogue_ap_potential')
+        if not scan_ids:
+            return jsonify({'success': True, 'updated_count': 0})
         
-        scans = WirelessScan.query.filter(WirelessScan.id.in_(scan_ids)).all()
-        
-        for scan in scans:
-            scan.rogue_ap_potential = rogue_ap_potential
+        groups = sessions_for_scan_ids(scan_ids)
+        environment_ids = set()
+        updated_count = 0
+        for session, ids in groups:
+            scans = session.query(WirelessScan).filter(WirelessScan.id.in_(ids)).all()
+            for scan in scans:
+                scan.rogue_ap_potential = rogue_ap_potential
+            # A selection can span environments: every one of them has changed
+            environment_ids.update(scan.environment_id for scan in scans)
+            updated_count += len(scans)
         
+        for session, _ in groups:
+            commit_scan_session(session)
+        Environment.bump_data_version(environment_ids)
         db.session.commit()
-        return jsonify({'success': True, 'updated_count': len(scans)})
+        return jsonify({'success': True, 'updated_count': updated_count})
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)})
@@ -342,8 +597,15 @@ def bulk_update_rogue_status():
 @main.route('/environment/<int:environment_id>/export')
 @login_required
 def export_html(environment_id):
-    environment = Environment.query.get_or_404(environment_id)
-    scans = WirelessScan.query.filter_by(environment_id=environment_id).order_by(WirelessScan.timestamp.desc()).all()
+    environment = Environment.get_active_or_404(environment_id)
+    snapshot = get_snapshot_cache().get(environment_id)
+    scans = list(snapshot.rows(snapshot.indices('timestamp')))
+    
+    # Archived scans are read back so the report covers the full history; a network
+    # uploaded again after it was archived is reported once, from the live row
+    archived = list(iter_archived_scans(environment_id, seen={(scan.bssid, scan.ssid) for scan in scans}))
+    if archived:
+        scans = sorted(scans + archived, key=lambda scan: scan.timestamp, reverse=True)
     
     # Get statistics
     total_scans = len(scans)
@@ -0,0 +1,216 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app, g
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateTable
+from werkzeug.exceptions import NotFound
+from . import db
+from .models import Environment, WirelessScan
+
+# Scan ids in a shard start at environment_id << SCAN_ID_BITS, so a scan id alone names its shard
+SCAN_ID_BITS = 32
+
+DEFAULT_FANOUT_THREADS = 4
+DEFAULT_POOL_SIZE = 1
+DEFAULT_MAX_OVERFLOW = 4
+DEFAULT_MAX_ENGINES = 32
+
+def sharding_enabled():
+    return bool(current_app.config.get('SHARD_FOLDER'))
+
+class ShardRouter:
+    """
+    Per-process registry of shard engines, one SQLite file per environment
+    under SHARD_FOLDER holding only its wireless_scans table. Users,
+    environments and every other table stay in the primary database.
+    At most max_engines shards stay open; the least recently used engine is
+    disposed when another one is needed. Shard files are only created by
+    writers; reads of an environment without one go to empty_engine.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+        self.folder = os.path.abspath(app.config['SHARD_FOLDER'])
+        self.engine_options = {
+            'connect_args': {'timeout': app.config.get('SQLITE_BUSY_TIMEOUT', 30)},
+            'pool_size': app.config.get('SHARD_POOL_SIZE', DEFAULT_POOL_SIZE),
+            'max_overflow': app.config.get('SHARD_MAX_OVERFLOW', DEFAULT_MAX_OVERFLOW),
+            'pool_pre_ping': True
+        }
+        self.max_engines = max(1, app.config.get('SHARD_MAX_ENGINES', DEFAULT_MAX_ENGINES))
+        self.executor = ThreadPoolExecutor(max_workers=app.config.get('SHARD_FANOUT_THREADS', DEFAULT_FANOUT_THREADS),
+                                           thread_name_prefix='shard-fanout')
+        self._engines = OrderedDict()
+        self._lock = threading.Lock()
+        self._table = _shard_table()
+        
+        # SingletonThreadPool: each thread gets its own in-memory database holding an empty scans table
+        self.empty_engine = create_engine('sqlite://')
+        self._empty_ddl = str(CreateTable(self._table, include_foreign_key_constraints=[])
+                              .compile(dialect=self.empty_engine.dialect))
+        event.listen(self.empty_engine, 'connect', self._create_empty_table)
+    
+    def path(self, environment_id):
+        return os.path.join(self.folder, f'environment_{int(environment_id)}.db')
+    
+    def has_shard(self, environment_id):
+        return environment_id in self._engines or os.path.exists(self.path(environment_id))
+    
+    def engine(self, environment_id, create=False):
+        """
+        Engine for an environment's shard, or None if it has no shard file yet.
+        With create the file is made for a known environment instead.
+        """
+        with self._lock:
+            engine = self._engines.get(environment_id)
+            if engine is not None:
+                self._engines.move_to_end(environment_id)
+                return engine
+            
+            path = self.path(environment_id)
+            if not os.path.exists(path):
+                if not create:
+                    return None
+                if db.session.get(Environment, environment_id) is None:
+                    raise NotFound()
+            os.makedirs(self.folder, exist_ok=True)
+            engine = create_engine(f'sqlite:///{path}', **self.engine_options)
+            self._create_schema(engine, environment_id)
+            self._engines[environment_id] = engine
+            
+            # Sessions still using an evicted engine keep working; its connections close as they are returned
+            while len(self._engines) > self.max_engines:
+                _, evicted = self._engines.popitem(last=False)
+                evicted.dispose()
+        return engine
+    
+    def engines(self):
+        with self._lock:
+            return list(self._engines.values())
+    
+    def _create_empty_table(self, dbapi_connection, connection_record):
+        dbapi_connection.execute(self._empty_ddl)
+    
+    def _create_schema(self, engine, environment_id):
+        with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            if inspect(conn).has_table(self._table.name):
+                return
+            # The file is still empty, so switching it to incremental auto-vacuum (used by purges) is instant
+            conn.exec_driver_sql('PRAGMA auto_vacuum = INCREMENTAL')
+            conn.exec_driver_sql('VACUUM')
+        
+        with engine.begin() as conn:
+            if inspect(conn).has_table(self._table.name):
+                return
+            # No foreign keys: users and environments live in the primary database
+            conn.execute(CreateTable(self._table, include_foreign_key_constraints=[]))
+            for index in self._table.indexes:
+                index.create(conn)
+            conn.exec_driver_sql('INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)',
+                                 (self._table.name, int(environment_id) << SCAN_ID_BITS))
+
+def _shard_table():
+    """Copy of the wireless_scans table for shard files, with AUTOINCREMENT so the id offset sticks"""
+    table = WirelessScan.__table__.to_metadata(db.MetaData())
+    table.dialect_options['sqlite']['autoincrement'] = True
+    return table
+
+_router_lock = threading.Lock()
+
+def get_router():
+    """The current app's shard router, created on first use (None when sharding is off)"""
+    if not sharding_enabled():
+        return None
+    app = current_app._get_current_object()
+    with _router_lock:
+        router = app.extensions.get('shard_router')
+        if router is None:
+            router = ShardRouter(app)
+            app.extensions['shard_router'] = router
+    return router
+
+def scan_session(environment_id, create=False):
+    """
+    Session holding an environment's scans: db.session normally, or a session
+    on the environment's shard (one per app context) when sharding is on.
+    Writers pass create=True so the shard file is made on first use; readers
+    of an environment without one get an empty session instead.
+    Callers commit it themselves, before db.session when both are used.
+    """
+    router = get_router()
+    if router is None:
+        return db.session
+    
+    if 'shard_sessions' not in g:
+        g.shard_sessions = {}
+    session = g.shard_sessions.get(environment_id)
+    if session is None:
+        engine = router.engine(environment_id, create)
+        if engine is None:
+            # Not cached per environment, so a writer later in this context still gets the real shard
+            if 'empty_shard_session' not in g:
+                g.empty_shard_session = Session(bind=router.empty_engine)
+            return g.empty_shard_session
+        session = g.shard_sessions[environment_id] = Session(bind=engine)
+    return session
+
+def commit_scan_session(session):
+    """
+    Commit a shard session on its own, before the caller writes to db.session
+    (ledger rows, data_version bumps), so the primary database's write lock is
+    only held for those short writes. Without sharding the scans belong to
+    db.session and are committed with it.
+    """
+    if session is not db.session:
+        session.commit()
+
+def scan_session_for_id(scan_id):
+    """Session that holds the scan with this id"""
+    if not sharding_enabled():
+        return db.session
+    return scan_session(int(scan_id) >> SCAN_ID_BITS)
+
+def sessions_for_scan_ids(scan_ids):
+    """Pair each session with the given scan ids that it holds"""
+    if not sharding_enabled():
+        return [(db.session, list(scan_ids))]
+    by_environment = {}
+    for scan_id in scan_ids:
+        by_environment.setdefault(int(scan_id) >> SCAN_ID_BITS, []).append(scan_id)
+    return [(scan_session(environment_id), ids) for environment_id, ids in by_environment.items()]
+
+def scan_engine(environment_id):
+    """Engine holding an environment's scans (None for a shard never written to)"""
+    router = get_router()
+    return router.engine(environment_id) if router else db.engine
+
+def close_shard_sessions(exception=None):
+    for session in g.pop('shard_sessions', {}).values():
+        session.close()
+    empty_session = g.pop('empty_shard_session', None)
+    if empty_session is not None:
+        empty_session.close()
+
+def fan_out(query, environment_ids):
+    """
+    Run query(session, environment_ids) against wherever the scans live and
+    return the list of results: one call on db.session when sharding is off,
+    otherwise one call per environment's shard on a small thread pool
+    (environments without a shard file have no scans and are skipped).
+    """
+    environment_ids = list(environment_ids)
+    router = get_router()
+    if router is None:
+        return [query(db.session, environment_ids)] if environment_ids else []
+    
+    environment_ids = [environment_id for environment_id in environment_ids if router.has_shard(environment_id)]
+    app = current_app._get_current_object()
+    
+    def run(environment_id):
+        with app.app_context():
+            return query(scan_session(environment_id), [environment_id])
+    
+    return list(router.executor.map(run, environment_ids))
@@ -0,0 +1,244 @@
+import sys
+import threading
+from array import array
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timedelta
+from flask import current_app
+from .models import Environment, WirelessScan, db
+from .shards import scan_session
+from .validation import BSSID_PATTERN
+
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+# Marker for a NULL integer in the typed columns
+NULL_INT = -2 ** 31
+
+# Marker in the bssid column for a stored BSSID that is not XX:XX:XX:XX:XX:XX (kept as text instead)
+UNPARSED_BSSID = -1
+
+EPOCH = datetime(1970, 1, 1)
+
+# Read-only row handed to templates; attribute-compatible with WirelessScan
+ScanRow = namedtuple('ScanRow', ['id', 'environment_id', 'bssid', 'ssid', 'quality', 'signal', 'channel',
+                                 'encryption', 'timestamp', 'remarks', 'rogue_ap_potential'])
+
+SORT_COLUMNS = ('bssid', 'ssid', 'quality', 'signal', 'channel', 'encryption', 'timestamp', 'rogue')
+
+def bssid_to_int(bssid):
+    """48-bit integer for a well-formed BSSID, None for anything else (e.g. rows stored by older versions)"""
+    if not bssid or not BSSID_PATTERN.fullmatch(bssid):
+        return None
+    return int(bssid.replace(':', ''), 16)
+
+def int_to_bssid(value):
+    text = f'{value:012X}'
+    return ':'.join(text[i:i + 2] for i in range(0, 12, 2))
+
+class EnvironmentSnapshot:
+    """
+    Column-oriented copy of one environment's scans at a given snapshot_version.
+    BSSIDs are stored as 48-bit integers, SSIDs and encryption types are
+    interned into small string tables, numbers/timestamps live in typed arrays
+    and remarks (and BSSIDs that are not well formed) are kept sparsely.
+    """
+    
+    def __init__(self, environment_id, version):
+        self.environment_id = environment_id
+        self.version = version
+        self.ids = array('q')
+        self.bssids = array('q')
+        self.ssid_refs = array('l')
+        self.encryption_refs = array('l')
+        self.quality = array('l')
+        self.signal = array('l')
+        self.channel = array('l')
+        self.timestamps = array('d')  # seconds since EPOCH (naive UTC, as stored)
+        self.rogue = bytearray()
+        self.remarks = {}  # row index -> remarks, only for rows that have them
+        self.raw_bssids = {}  # row index -> stored text, only for rows marked UNPARSED_BSSID
+        self.ssid_table = []
+        self.encryption_table = []
+        self.last_upload = None
+        self.unique_networks = 0
+        self.rogue_count = 0
+    
+    @classmethod
+    def load(cls, environment_id, version):
+        """Build a snapshot with a plain column query (no ORM objects)"""
+        snapshot = cls(environment_id, version)
+        ssid_lookup = {}
+        encryption_lookup = {}
+        
+        query = db.select(
+            WirelessScan.id, WirelessScan.bssid, WirelessScan.ssid, WirelessScan.quality, WirelessScan.signal,
+            WirelessScan.channel, WirelessScan.encryption, WirelessScan.timestamp, WirelessScan.remarks,
+            WirelessScan.rogue_ap_potential, WirelessScan.uploaded_at
+        ).where(WirelessScan.environment_id == environment_id)
+        rows = scan_session(environment_id).execute(query.execution_options(yield_per=5000))
+        
+        networks = set()
+        for scan_id, bssid, ssid, quality, signal, channel, encryption, timestamp, remarks, rogue, uploaded_at in rows:
+            index = len(snapshot.ids)
+            snapshot.ids.append(scan_id)
+            value = bssid_to_int(bssid)
+            if value is None:
+                snapshot.raw_bssids[index] = bssid or ''
+                value = UNPARSED_BSSID
+            snapshot.bssids.append(value)
+            snapshot.ssid_refs.append(_intern(ssid or '', ssid_lookup, snapshot.ssid_table))
+            snapshot.encryption_refs.append(_intern(encryption or '', encryption_lookup, snapshot.encryption_table))
+            snapshot.quality.append(NULL_INT if quality is None else quality)
+            snapshot.signal.append(NULL_INT if signal is None else signal)
+            snapshot.channel.append(NULL_INT if channel is None else channel)
+            snapshot.timestamps.append((timestamp - EPOCH).total_seconds())
+            snapshot.rogue.append(1 if rogue else 0)
+            if remarks:
+                snapshot.remarks[index] = remarks
+            if uploaded_at and (snapshot.last_upload is None or uploaded_at > snapshot.last_upload):
+                snapshot.last_upload = uploaded_at
+            networks.add((snapshot.raw_bssids.get(index, value), snapshot.ssid_refs[index]))
+        
+        snapshot.unique_networks = len(networks)
+        snapshot.rogue_count = sum(snapshot.rogue)
+        return snapshot
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    @property
+    def nbytes(self):
+        """Approximate memory footprint, used for the cache budget"""
+        arrays = (self.ids, self.bssids, self.ssid_refs, self.encryption_refs, self.quality, self.signal,
+                  self.channel, self.timestamps)
+        size = sum(a.itemsize * len(a) for a in arrays) + len(self.rogue)
+        size += sum(sys.getsizeof(text) for text in self.ssid_table + self.encryption_table)
+        size += sum(sys.getsizeof(text) + 16 for text in self.remarks.values())
+        size += sum(sys.getsizeof(text) + 16 for text in self.raw_bssids.values())
+        return size
+    
+    def indices(self, sort='timestamp', descending=True, rogue=None):
+        """Row indices, optionally filtered by rogue flag and sorted by a column"""
+        selected = range(len(self.ids))
+        if rogue is not None:
+            flag = 1 if rogue else 0
+            selected = [i for i in selected if self.rogue[i] == flag]
+        
+        key = self._sort_key(sort)
+        return sorted(selected, key=key, reverse=descending)
+    
+    def rows(self, indices=None):
+        """Materialise ScanRow tuples for the given row indices"""
+        if indices is None:
+            indices = range(len(self.ids))
+        for i in indices:
+            yield ScanRow(
+                id=self.ids[i],
+                environment_id=self.environment_id,
+                bssid=self.raw_bssids[i] if i in self.raw_bssids else int_to_bssid(self.bssids[i]),
+                ssid=self.ssid_table[self.ssid_refs[i]],
+                quality=_nullable(self.quality[i]),
+                signal=_nullable(self.signal[i]),
+                channel=_nullable(self.channel[i]),
+                encryption=self.encryption_table[self.encryption_refs[i]] or None,
+                timestamp=EPOCH + timedelta(seconds=self.timestamps[i]),
+                remarks=self.remarks.get(i),
+                rogue_ap_potential=bool(self.rogue[i])
+            )
+    
+    def _sort_key(self, column):
+        if column == 'bssid':
+            return self.bssids.__getitem__
+        if column == 'ssid':
+            return lambda i: self.ssid_table[self.ssid_refs[i]].lower()
+        if column in ('quality', 'signal', 'channel'):
+            return getattr(self, column).__getitem__
+        if column == 'encryption':
+            return lambda i: self.encryption_table[self.encryption_refs[i]].lower()
+        if column == 'rogue':
+            return self.rogue.__getitem__
+        return self.timestamps.__getitem__
+
+def _intern(value, lookup, table):
+    ref = lookup.get(value)
+    if ref is None:
+        ref = lookup[value] = len(table)
+        table.append(value)
+    return ref
+
+def _nullable(value):
+    return None if value == NULL_INT else value
+
+class SnapshotCache:
+    """
+    Per-process LRU of EnvironmentSnapshots bounded by an approximate memory
+    budget. Each lookup compares the cached version with the environment's
+    current snapshot_version and rebuilds on mismatch.
+    """
+    
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._snapshots = OrderedDict()
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+    
+    def get(self, environment_id):
+        row = db.session.query(Environment.created_at, Environment.data_version) \
+            .filter(Environment.id == environment_id).first()
+        if row is None:
+            self.invalidate(environment_id)
+            return None
+        version = tuple(row)  # Environment.snapshot_version
+        
+        with self._lock:
+            cached = self._snapshots.get(environment_id)
+            if cached is not None and cached[0].version == version:
+                self._snapshots.move_to_end(environment_id)
+                self.stats['hits'] += 1
+                return cached[0]
+        
+        snapshot = EnvironmentSnapshot.load(environment_id, version)
+        self._store(snapshot)
+        return snapshot
+    
+    def peek(self, environment_id, version):
+        """Cached snapshot if it is still current, without loading anything"""
+        with self._lock:
+            cached = self._snapshots.get(environment_id)
+            if cached is not None and cached[0].version == version:
+                return cached[0]
+        return None
+    
+    def invalidate(self, environment_id):
+        with self._lock:
+            cached = self._snapshots.pop(environment_id, None)
+            if cached is not None:
+                self.total_bytes -= cached[1]
+    
+    def _store(self, snapshot):
+        size = snapshot.nbytes
+        with self._lock:
+            self.stats['misses'] += 1
+            previous = self._snapshots.pop(snapshot.environment_id, None)
+            if previous is not None:
+                self.total_bytes -= previous[1]
+            if size > self.max_bytes:
+                return
+            self._snapshots[snapshot.environment_id] = (snapshot, size)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._snapshots.popitem(last=False)
+                self.total_bytes -= evicted_size
+                self.stats['evictions'] += 1
+
+_cache_lock = threading.Lock()
+
+def get_snapshot_cache():
+    """The current app's snapshot cache, created on first use"""
+    app = current_app._get_current_object()
+    with _cache_lock:
+        cache = app.extensions.get('snapshot_cache')
+        if cache is None:
+            cache = SnapshotCache(app.config.get('SNAPSHOT_CACHE_BYTES', DEFAULT_CACHE_BYTES))
+            app.extensions['snapshot_cache'] = cache
+    return cache
@@ -1,134 +1,119 @@
-import csv
+import hashlib
 import io
 from datetime import datetime
-from flask import flash
+from flask import current_app, flash
 from .models import WirelessScan
+from .parsers import HEAD_BYTES, ScanFileError, detect_parser
+from .shards import scan_session
+
+# Accepted scan timestamp formats, tried in order
+TIMESTAMP_FORMATS = [
+    '%Y-%m-%d %H:%M:%S',
+    '%Y/%m/%d %H:%M:%S',
+    '%d-%m-%Y %H:%M:%S',
+    '%d/%m/%Y %H:%M:%S',
+    '%Y-%m-%d %H:%M',
+    '%Y/%m/%d %H:%M',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%dT%H:%M:%SZ',
+]
 
 def parse_csv_data(csv_content, environment_id, user_id):
     """
     Parse CSV data and return a list of WirelessScan objects.
     Performs validation and deduplication.
     """
+    scans, errors, duplicates, _ = parse_scan_file(io.BytesIO(csv_content.encode('utf-8')), environment_id, user_id)
+    return scans, errors, duplicates
+
+def parse_scan_file(stream, environment_id, user_id, rejects=None):
+    """
+    Detect the format of an uploaded scan file (binary, seekable stream) and
+    parse it record by record into WirelessScan objects.
+    Returns (scans, errors, duplicates, format_name).
+    """
+    head = stream.read(HEAD_BYTES)
+    stream.seek(0)
+    
+    parser = detect_parser(head.decode('utf-8', errors='ignore'))
+    scans, errors, duplicates = parse_scan_records(parser.iter_records(stream), environment_id, user_id, rejects)
+    return scans, errors, duplicates, parser.name
+
+def parse_scan_records(records, environment_id, user_id, rejects=None):
+    """
+    Validate and deduplicate an iterable of scan records (dicts of strings
+    keyed by SCAN_FIELDS) and return a list of WirelessScan objects.
+    Records are validated a chunk at a time, column by column; errors are
+    returned as an ErrorSummary and bad rows optionally written to rejects.
+    """
+    from .validation import ErrorSummary, iter_chunks, validate_chunk
+    
     scans = []
-    errors = []
+    errors = ErrorSummary()
     duplicates = 0
     
-    # Required CSV columns
-    required_columns = ['bssid', 'ssid', 'quality', 'signal', 'channel', 'encryption', 'timestamp']
-    
     try:
-        # Use StringIO to read CSV content
-        csv_file = io.StringIO(csv_content)
-        reader = csv.DictReader(csv_file)
-        
-        # Validate headers
-        if not reader.fieldnames:
-            errors.append("CSV file appears to be empty or invalid")
-            return scans, errors, duplicates
-        
-        missing_columns = set(required_columns) - set(reader.fieldnames)
-        if missing_columns:
-            errors.append(f"Missing required columns: {', '.join(missing_columns)}")
-            return scans, errors, duplicates
-        
         # Get existing scans for deduplication check
-        existing_scans = WirelessScan.query.filter_by(environment_id=environment_id).all()
-        existing_pairs = {(scan.bssid, scan.ssid) for scan in existing_scans}
+        existing_pairs = set(
+            scan_session(environment_id).query(WirelessScan.bssid, WirelessScan.ssid)
+            .filter(WirelessScan.environment_id == environment_id)
+            .all()
+        )
         
-        row_number = 0
-        for row in reader:
-            row_number += 1
+        row_number = 1
+        timestamp_hint = [None]
+        for chunk in iter_chunks(records):
+            columns = validate_chunk(chunk, row_number, errors, rejects, timestamp_hint)
+            row_number += len(chunk)
             
-            try:
-                # Validate and clean data
-                bssid = row['bssid'].strip().upper()
-                ssid = row['ssid'].strip()
-                
-                # Basic BSSID format validation (MAC address)
-                if not validate_bssid(bssid):
-                    errors.append(f"Row {row_number}: Invalid BSSID format '{bssid}'")
-                    continue
-                
+            for _, bssid, ssid, quality, signal, channel, encryption, timestamp in columns.rows():
                 # Check for duplicates
                 if (bssid, ssid) in existing_pairs:
                     duplicates += 1
                     continue
                 
-                # Parse numeric fields
-                try:
-                    quality = int(row['quality']) if row['quality'].strip() else None
-                    signal = int(row['signal']) if row['signal'].strip() else None
-                    channel = int(row['channel']) if row['channel'].strip() else None
-                except ValueError as e:
-                    errors.append(f"Row {row_number}: Invalid numeric value - {str(e)}")
-                    continue
-                
-                # Parse timestamp
-                timestamp_str = row['timestamp'].strip()
-                timestamp = parse_timestamp(timestamp_str)
-                if not timestamp:
-                    errors.append(f"Row {row_number}: Invalid timestamp format '{timestamp_str}'")
-                    continue
-                
-                # Create WirelessScan object
-                scan = WirelessScan(
+                scans.append(WirelessScan(
                     environment_id=environment_id,
                     bssid=bssid,
                     ssid=ssid,
                     quality=quality,
                     signal=signal,
                     channel=channel,
-                    encryption=row['encryption'].strip(),
+                    encryption=encryption,
                     timestamp=timestamp,
                     uploaded_by=user_id
-                )
-                
-                scans.append(scan)
+                ))
                 existing_pairs.add((bssid, ssid))  # Prevent duplicates within the same upload
-                
-            except Exception as e:
-                errors.append(f"Row {row_number}: Error processing row - {str(e)}")
-                continue
     
+    except ScanFileError as e:
+        errors.add(str(e))
+    except UnicodeDecodeError:
+        errors.add("Error reading file. Please ensure it is a valid UTF-8 encoded file.")
     except Exception as e:
-        errors.append(f"Error reading CSV file: {str(e)}")
+        current_app.logger.exception('Unexpected error parsing scan file')
+        errors.add(f"Error reading CSV file: {str(e)}")
+    finally:
+        if rejects is not None:
+            rejects.close()
     
     return scans, errors, duplicates
 
-def validate_bssid(bssid):
-    """Validate BSSID format (MAC address)"""
-    if not bssid or len(bssid) != 17:
-        return False
-    
-    # Check format: XX:XX:XX:XX:XX:XX
-    parts = bssid.split(':')
-    if len(parts) != 6:
-        return False
-    
-    for part in parts:
-        if len(part) != 2:
-            return False
-        try:
-            int(part, 16)  # Check if valid hex
-        except ValueError:
-            return False
-    
-    return True
+def compute_digest(stream, chunk_size=65536):
+    """
+    Return (SHA-256 hex digest, size in bytes) of a binary stream, read in
+    chunks. The stream is rewound afterwards.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in iter(lambda: stream.read(chunk_size), b''):
+        digest.update(chunk)
+        size += len(chunk)
+    stream.seek(0)
+    return digest.hexdigest(), size
 
 def parse_timestamp(timestamp_str):
     """Parse timestamp from various common formats"""
-    formats = [
-        '%Y-%m-%d %H:%M:%S',
-        '%Y/%m/%d %H:%M:%S',
-        '%d-%m-%Y %H:%M:%S',
-        '%d/%m/%Y %H:%M:%S',
-        '%Y-%m-%d %H:%M',
-        '%Y/%m/%d %H:%M',
-        '%Y-%m-%dT%H:%M:%S',
-        '%Y-%m-%dT%H:%M:%SZ',
-    ]
-    
-    for fmt in formats:
+    for fmt in TIMESTAMP_FORMATS:
         try:
             return datetime.strptime(timestamp_str, fmt)
         except ValueError:
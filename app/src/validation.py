@@ -0,0 +1,250 @@
+import csv
+import os
+import re
+import time
+import uuid
+from array import array
+from datetime import datetime
+from itertools import islice
+from .parsers import SCAN_FIELDS
+from .utils import TIMESTAMP_FORMATS
+
+# Rows validated per batch
+CHUNK_ROWS = 5000
+
+# Example rows kept per error kind
+MAX_ERROR_EXAMPLES = 5
+
+# Marker for an empty numeric cell in the typed columns
+NULL_INT = -2 ** 31
+
+# Reject files older than this are removed when a new one is written
+REJECT_FILE_MAX_AGE = 24 * 60 * 60
+
+BSSID_PATTERN = re.compile(r'[0-9A-F]{2}(?::[0-9A-F]{2}){5}')
+
+# Column limits of wireless_scans: longer SSIDs are rejected, longer encryption types truncated
+MAX_SSID_LENGTH = 32
+MAX_ENCRYPTION_LENGTH = 50
+
+class ErrorSummary:
+    """
+    Validation errors aggregated by kind: a count plus the first few example
+    rows per kind. Iterating yields one readable line per kind, so the summary
+    stays small however many rows are bad.
+    """
+    
+    def __init__(self, max_examples=MAX_ERROR_EXAMPLES):
+        self.max_examples = max_examples
+        self.kinds = {}
+        self.total = 0
+    
+    def add(self, kind, row_number=None, value=None):
+        entry = self.kinds.setdefault(kind, {'count': 0, 'examples': []})
+        entry['count'] += 1
+        self.total += 1
+        if len(entry['examples']) < self.max_examples:
+            entry['examples'].append((row_number, value))
+    
+    def messages(self):
+        lines = []
+        for kind, entry in self.kinds.items():
+            examples = [f"row {row_number}: '{value}'" for row_number, value in entry['examples'] if row_number is not None]
+            if not examples:
+                lines.append(kind)
+                continue
+            more = ', ...' if entry['count'] > len(examples) else ''
+            lines.append(f"{kind}: {entry['count']} row(s) (e.g. {', '.join(examples)}{more})")
+        return lines
+    
+    def __iter__(self):
+        return iter(self.messages())
+    
+    def __len__(self):
+        return len(self.kinds)
+    
+    def __bool__(self):
+        return self.total > 0
+
+class RejectFile:
+    """CSV of rejected rows (row number, error, original fields), created on first write"""
+    
+    def __init__(self, directory):
+        self.directory = directory
+        self.filename = None
+        self.count = 0
+        self._file = None
+        self._writer = None
+    
+    @property
+    def path(self):
+        return os.path.join(self.directory, self.filename) if self.filename else None
+    
+    def write(self, row_number, error, record):
+        if self._writer is None:
+            os.makedirs(self.directory, exist_ok=True)
+            _prune_reject_files(self.directory)
+            self.filename = f'rejects_{uuid.uuid4().hex}.csv'
+            self._file = open(self.path, 'w', newline='', encoding='utf-8')
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(['row', 'error'] + SCAN_FIELDS)
+        self._writer.writerow([row_number, error] + [record.get(field, '') for field in SCAN_FIELDS])
+        self.count += 1
+    
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+def _prune_reject_files(directory):
+    cutoff = time.time() - REJECT_FILE_MAX_AGE
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.startswith('rejects_') and os.path.getmtime(path) < cutoff:
+            os.remove(path)
+
+def iter_chunks(records, size=CHUNK_ROWS):
+    """Group a record iterator into lists of at most size records"""
+    iterator = iter(records)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+class ScanColumns:
+    """One validated chunk held column-wise; numeric columns are typed arrays using NULL_INT for empty cells"""
+    
+    def __init__(self):
+        self.row_numbers = array('l')
+        self.bssid = []
+        self.ssid = []
+        self.quality = array('l')
+        self.signal = array('l')
+        self.channel = array('l')
+        self.encryption = []
+        self.timestamp = []
+    
+    def __len__(self):
+        return len(self.bssid)
+    
+    def rows(self):
+        """Yield (row_number, bssid, ssid, quality, signal, channel, encryption, timestamp) with None for empty numbers"""
+        for i in range(len(self.bssid)):
+            yield (
+                self.row_numbers[i], self.bssid[i], self.ssid[i],
+                _nullable(self.quality[i]), _nullable(self.signal[i]), _nullable(self.channel[i]),
+                self.encryption[i], self.timestamp[i]
+            )
+
+def _nullable(value):
+    return None if value == NULL_INT else value
+
+def _int_column(values, valid, reasons, kind):
+    column = array('l', [NULL_INT]) * len(values)
+    for i, raw in enumerate(values):
+        if not valid[i]:
+            continue
+        text = raw.strip()
+        if not text:
+            continue
+        try:
+            column[i] = int(text)
+        except (ValueError, OverflowError):
+            valid[i] = 0
+            reasons[i] = (kind, raw)
+    return column
+
+def _timestamp_column(values, valid, reasons, hint):
+    """
+    Parse timestamps, trying the format that matched last (hint[0]) first and
+    caching repeated values; files almost always use a single format.
+    """
+    column = [None] * len(values)
+    cache = {}
+    for i, raw in enumerate(values):
+        if not valid[i]:
+            continue
+        text = raw.strip()
+        if text not in cache:
+            cache[text] = _parse_with_hint(text, hint)
+        parsed = cache[text]
+        if parsed is None:
+            valid[i] = 0
+            reasons[i] = ('Invalid timestamp format', text)
+        column[i] = parsed
+    return column
+
+def _parse_with_hint(text, hint):
+    formats = [hint[0]] + TIMESTAMP_FORMATS if hint[0] else TIMESTAMP_FORMATS
+    for fmt in formats:
+        try:
+            parsed = datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+        hint[0] = fmt
+        return parsed
+    return None
+
+def validate_chunk(chunk, first_row_number, errors, rejects=None, hint=None):
+    """
+    Validate a chunk of records column by column. Invalid rows are counted in
+    errors (and written to rejects); the valid rows are returned as ScanColumns.
+    """
+    size = len(chunk)
+    hint = hint if hint is not None else [None]
+    valid = bytearray(b'\x01') * size
+    reasons = [None] * size
+    
+    def column(field):
+        return [record.get(field) or '' for record in chunk]
+    
+    bssids = [value.strip().upper() for value in column('bssid')]
+    for i, bssid in enumerate(bssids):
+        if not BSSID_PATTERN.fullmatch(bssid):
+            valid[i] = 0
+            reasons[i] = ('Invalid BSSID format', bssid)
+    
+    ssids = [value.strip() for value in column('ssid')]
+    for i, ssid in enumerate(ssids):
+        if valid[i] and len(ssid) > MAX_SSID_LENGTH:
+            valid[i] = 0
+            reasons[i] = ('SSID too long', ssid)
+    
+    quality = _int_column(column('quality'), valid, reasons, 'Invalid quality value')
+    signal = _int_column(column('signal'), valid, reasons, 'Invalid signal value')
+    channel = _int_column(column('channel'), valid, reasons, 'Invalid channel value')
+    timestamps = _timestamp_column(column('timestamp'), valid, reasons, hint)
+    encryptions = column('encryption')
+    
+    result = ScanColumns()
+    for i in range(size):
+        row_number = first_row_number + i
+        if not valid[i]:
+            kind, value = reasons[i]
+            errors.add(kind, row_number, value)
+            if rejects is not None:
+                rejects.write(row_number, kind, chunk[i])
+            continue
+        result.row_numbers.append(row_number)
+        result.bssid.append(bssids[i])
+        result.ssid.append(ssids[i])
+        result.quality.append(quality[i])
+        result.signal.append(signal[i])
+        result.channel.append(channel[i])
+        result.encryption.append(encryptions[i].strip()[:MAX_ENCRYPTION_LENGTH])
+        result.timestamp.append(timestamps[i])
+    return result
+
+def validate_record(record):
+    """
+    Validate a single record with the rules of validate_chunk. Returns
+    ((bssid, ssid, quality, signal, channel, encryption, timestamp), None)
+    or (None, (kind, value)) for the first problem found.
+    """
+    errors = ErrorSummary(max_examples=1)
+    columns = validate_chunk([record], 1, errors)
+    if errors:
+        kind, entry = next(iter(errors.kinds.items()))
+        return None, (kind, entry['examples'][0][1])
+    return next(columns.rows())[1:], None
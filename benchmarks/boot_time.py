@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Cold boot benchmark: time from a fresh interpreter to an app that has served
+its first request, as a gunicorn worker would see it.
+
+    python benchmarks/boot_time.py [--runs 10] [--with-create-all]
+
+--with-create-all adds the schema inspection the app used to run on every
+import, for comparison.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import time
+started = time.perf_counter()
+from app.src import create_app, db
+imported = time.perf_counter()
+app = create_app()
+if {create_all}:
+    with app.app_context():
+        db.create_all()
+created = time.perf_counter()
+app.test_client().get('/login')
+ready = time.perf_counter()
+print(imported - started, created - imported, ready - created, ready - started)
+"""
+
+def run_once(database_uri, create_all):
+    env = dict(os.environ, DATABASE_URI=database_uri, PYTHONPATH=REPO_ROOT)
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD.format(create_all=create_all)],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return [float(value) * 1000 for value in output.split()]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--with-create-all', action='store_true')
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        database_uri = f'sqlite:///{os.path.join(tmp, "bench.db")}'
+        
+        # Schema is created once up front, exactly like `flask init-db`
+        run_once(database_uri, create_all=True)
+        
+        samples = [run_once(database_uri, args.with_create_all) for _ in range(args.runs)]
+    
+    labels = ['import', 'create_app', 'first request', 'total']
+    print(f"Cold boot over {args.runs} run(s){' with create_all' if args.with_create_all else ''} (ms):")
+    for index, label in enumerate(labels):
+        values = [sample[index] for sample in samples]
+        print(f"  {label:<14} median {statistics.median(values):8.1f}   max {max(values):8.1f}")
+
+if __name__ == '__main__':
+    main()
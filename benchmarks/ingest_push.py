@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Sensor push benchmark: many small posts to /api/v1/scans from concurrent
+clients, reporting accepted posts/second against database commits/second.
+
+    python benchmarks/ingest_push.py [--posts 5000] [--rows-per-post 2] [--clients 8]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--posts', type=int, default=5000)
+    parser.add_argument('--rows-per-post', type=int, default=2)
+    parser.add_argument('--clients', type=int, default=8)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URI'] = f'sqlite:///{os.path.join(tmp, "ingest.db")}'
+        from app.src import create_app, db
+        from app.src.models import User, Environment, SensorToken, WirelessScan
+        from app.src.ingest import get_write_buffer
+        
+        app = create_app()
+        with app.app_context():
+            db.create_all()
+            user = User(username='bench', is_admin=True, is_approved=True)
+            user.set_password('bench')
+            db.session.add(user)
+            db.session.flush()
+            environment = Environment(name='Bench', created_by=user.id)
+            db.session.add(environment)
+            db.session.flush()
+            sensor_token, token = SensorToken.generate('bench', environment.id, user.id)
+            db.session.add(sensor_token)
+            db.session.commit()
+        
+        headers = {'Authorization': f'Bearer {token}'}
+        counter = iter(range(args.posts))
+        lock = threading.Lock()
+        
+        def client():
+            test_client = app.test_client()
+            while True:
+                with lock:
+                    post = next(counter, None)
+                if post is None:
+                    return
+                rows = []
+                for offset in range(args.rows_per_post):
+                    n = post * args.rows_per_post + offset
+                    rows.append({'bssid': f'02:00:00:{n >> 16 & 255:02X}:{n >> 8 & 255:02X}:{n & 255:02X}', 'ssid': 'bench',
+                                 'signal': -50, 'channel': 6, 'timestamp': '2024-01-01 12:00:00'})
+                test_client.post('/api/v1/scans', json=rows, headers=headers)
+        
+        started = time.perf_counter()
+        threads = [threading.Thread(target=client) for _ in range(args.clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        posted = time.perf_counter() - started
+        
+        with app.app_context():
+            buffer = get_write_buffer()
+            buffer.flush()
+            elapsed = time.perf_counter() - started
+            rows = db.session.query(db.func.count(WirelessScan.id)).scalar()
+        
+        print(f'{args.posts} posts x {args.rows_per_post} rows from {args.clients} clients')
+        print(f'  posts/s       {args.posts / posted:10.1f}')
+        print(f'  rows stored   {rows:10d}')
+        print(f'  commits       {buffer.stats["flushes"]:10d}   ({buffer.stats["flushes"] / elapsed:.1f}/s)')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Local load test: start gunicorn with the production config at increasing
+worker counts and measure requests/second against an environment page.
+
+    python benchmarks/load_test.py [--workers 1 2 4] [--threads 4] [--clients 16] [--duration 10]
+
+Throughput should grow with the worker count up to the number of cores.
+"""
+import argparse
+import multiprocessing
+import os
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SEED = """
+from datetime import datetime, timedelta
+from app.src import create_app, db
+from app.src.models import User, Environment, WirelessScan
+app = create_app()
+with app.app_context():
+    db.create_all()
+    user = User(username='loadtest', is_admin=True, is_approved=True)
+    user.set_password('loadtest')
+    db.session.add(user)
+    db.session.flush()
+    environment = Environment(name='Load Test', created_by=user.id)
+    db.session.add(environment)
+    db.session.flush()
+    now = datetime.utcnow()
+    db.session.add_all([
+        WirelessScan(environment_id=environment.id, bssid=f'02:00:00:00:{i // 256:02X}:{i % 256:02X}', ssid=f'net-{i}',
+                     quality=i % 100, signal=-30 - i % 60, channel=1 + i % 11, encryption='WPA2',
+                     timestamp=now - timedelta(minutes=i), uploaded_by=user.id)
+        for i in range({scans})
+    ])
+    db.session.commit()
+"""
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def wait_until_up(base_url, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(base_url + '/login', timeout=1)
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('gunicorn did not start')
+
+def login(base_url):
+    """Log in once and return the session cookie shared by all clients"""
+    cookies = urllib.request.HTTPCookieProcessor()
+    opener = urllib.request.build_opener(cookies)
+    page = opener.open(base_url + '/login').read().decode()
+    token = re.search(r'name="csrf_token" type="hidden" value="([^"]+)"', page).group(1)
+    data = urllib.parse.urlencode({'csrf_token': token, 'username': 'loadtest', 'password': 'loadtest'}).encode()
+    opener.open(base_url + '/login', data=data)
+    return '; '.join(f'{cookie.name}={cookie.value}' for cookie in cookies.cookiejar)
+
+def hammer(url, cookie, deadline, results):
+    completed = errors = 0
+    request = urllib.request.Request(url, headers={'Cookie': cookie})
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                response.read()
+            completed += 1
+        except OSError:
+            errors += 1
+    results.append((completed, errors))
+
+def run_level(env, workers, threads, clients, duration, path):
+    port = free_port()
+    base_url = f'http://127.0.0.1:{port}'
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}',
+         '--workers', str(workers), '--threads', str(threads), '--access-logfile', '/dev/null'],
+        cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_until_up(base_url)
+        cookie = login(base_url)
+        results = []
+        deadline = time.time() + duration
+        client_threads = [threading.Thread(target=hammer, args=(base_url + path, cookie, deadline, results)) for _ in range(clients)]
+        for thread in client_threads:
+            thread.start()
+        for thread in client_threads:
+            thread.join()
+        completed = sum(result[0] for result in results)
+        errors = sum(result[1] for result in results)
+        return completed / duration, errors
+    finally:
+        server.terminate()
+        server.wait()
+
+def main():
+    cores = multiprocessing.cpu_count()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, nargs='+', default=sorted({1, max(cores // 2, 1), cores, cores * 2}))
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--scans', type=int, default=500)
+    parser.add_argument('--path', default='/environment/1')
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, PYTHONPATH=REPO_ROOT, SECRET_KEY='load-test',
+                   DATABASE_URI=f'sqlite:///{os.path.join(tmp, "load.db")}')
+        subprocess.run([sys.executable, '-c', SEED.replace('{scans}', str(args.scans))], cwd=REPO_ROOT, env=env, check=True)
+        
+        print(f'{cores} core(s), {args.threads} thread(s)/worker, {args.clients} clients, {args.duration:.0f}s per level, GET {args.path}')
+        baseline = None
+        for workers in args.workers:
+            rps, errors = run_level(env, workers, args.threads, args.clients, args.duration, args.path)
+            baseline = baseline or rps
+            print(f'  workers={workers:<3} {rps:8.1f} req/s   x{rps / baseline:4.2f}   errors={errors}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Parser benchmark: generate large capture exports in each supported format
+(native CSV, airodump-ng CSV, Kismet CSV, Kismet NetXML) and time detection
+plus streaming validation through parse_scan_file.
+
+    python benchmarks/parse_formats.py [--networks 100000] [--keep DIR]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+BASE_TIME = datetime(2024, 1, 1, 12, 0, 0)
+
+def networks(count):
+    for i in range(count):
+        yield {
+            'bssid': f'02:{i >> 24 & 255:02X}:{i >> 16 & 255:02X}:{i >> 8 & 255:02X}:{i & 255:02X}:01',
+            'ssid': f'net-{i}' if i % 10 else '',
+            'signal': -30 - i % 65,
+            'channel': 1 + i % 11,
+            'privacy': ('WPA2', 'WPA2 WPA', 'WEP', 'OPN')[i % 4],
+            'seen': BASE_TIME + timedelta(seconds=i)
+        }
+
+def write_native(path, count):
+    with open(path, 'w') as f:
+        f.write('bssid,ssid,quality,signal,channel,encryption,timestamp\n')
+        for n in networks(count):
+            f.write(f"{n['bssid']},{n['ssid']},{min(100, 2 * (n['signal'] + 100))},{n['signal']},{n['channel']},"
+                    f"{n['privacy']},{n['seen']:%Y-%m-%d %H:%M:%S}\n")
+
+def write_airodump(path, count):
+    with open(path, 'w', newline='') as f:
+        f.write('\r\nBSSID, First time seen, Last time seen, channel, Speed, Privacy, Cipher, Authentication, Power, '
+                '# beacons, # IV, LAN IP, ID-length, ESSID, Key\r\n')
+        for n in networks(count):
+            f.write(f"{n['bssid']}, {n['seen']:%Y-%m-%d %H:%M:%S}, {n['seen']:%Y-%m-%d %H:%M:%S}, {n['channel']:2d}, 54, "
+                    f"{n['privacy']:<4}, CCMP, PSK, {n['signal']:3d},      120,        0,   0.  0.  0.  0, "
+                    f"{len(n['ssid']):3d}, {n['ssid']}, \r\n")
+        f.write('\r\nStation MAC, First time seen, Last time seen, Power, # packets, BSSID, Probed ESSIDs\r\n')
+        for i in range(count // 4):
+            f.write(f"AA:00:00:{i >> 16 & 255:02X}:{i >> 8 & 255:02X}:{i & 255:02X}, 2024-01-01 12:00:00, "
+                    f"2024-01-01 12:05:00, -60,       12, (not associated) ,\r\n")
+
+def write_kismet_csv(path, count):
+    header = ('Network;NetType;ESSID;BSSID;Info;Channel;Cloaked;Encryption;Decrypted;MaxRate;MaxSeenRate;Beacon;LLC;'
+              'Data;Crypt;Weak;Total;Carrier;Encoding;FirstTime;LastTime;BestQuality;BestSignal;BestNoise;GPSMinLat;'
+              'GPSMinLon;GPSMinAlt;GPSMinSpd;GPSMaxLat;GPSMaxLon;GPSMaxAlt;GPSMaxSpd;GPSBestLat;GPSBestLon;GPSBestAlt;'
+              'DataSize;IPType;IP;\n')
+    with open(path, 'w') as f:
+        f.write(header)
+        for i, n in enumerate(networks(count)):
+            encryption = {'OPN': 'None', 'WPA2 WPA': 'WPA+PSK,WPA+TKIP'}.get(n['privacy'], n['privacy'])
+            seen = n['seen'].strftime('%a %b %d %H:%M:%S %Y')
+            f.write(f"{i + 1};infrastructure;{n['ssid']};{n['bssid']};;{n['channel']};No;{encryption};No;54.0;1000;"
+                    f"10;5;3;0;0;18;IEEE 802.11b+;;{seen};{seen};0;{n['signal']};0;0.0;0.0;0.0;0.0;0.0;0.0;0.0;0.0;"
+                    f"0.0;0.0;0.0;0;None;0.0.0.0;\n")
+
+def write_kismet_netxml(path, count):
+    with open(path, 'w') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<detection-run kismet-version="2016.07.R1" start-time="Mon Jan  1 12:00:00 2024">\n')
+        for i, n in enumerate(networks(count)):
+            seen = n['seen'].strftime('%a %b %d %H:%M:%S %Y')
+            encryption = {'OPN': ['None'], 'WPA2 WPA': ['WPA+PSK', 'WPA+AES-CCM']}.get(n['privacy'], [n['privacy']])
+            encryption_xml = ''.join(f'<encryption>{e}</encryption>' for e in encryption)
+            f.write(f'<wireless-network number="{i + 1}" type="infrastructure" first-time="{seen}" last-time="{seen}">'
+                    f'<SSID first-time="{seen}" last-time="{seen}"><type>Beacon</type><max-rate>54.000000</max-rate>'
+                    f'{encryption_xml}<essid cloaked="{"true" if not n["ssid"] else "false"}">{n["ssid"]}</essid></SSID>'
+                    f'<BSSID>{n["bssid"]}</BSSID><manuf>Unknown</manuf><channel>{n["channel"]}</channel>'
+                    f'<freqmhz>2437 7</freqmhz><maxseenrate>1000</maxseenrate>'
+                    f'<snr-info><last_signal_dbm>{n["signal"]}</last_signal_dbm><max_signal_dbm>{n["signal"]}</max_signal_dbm>'
+                    f'</snr-info></wireless-network>\n')
+        f.write('</detection-run>\n')
+
+FORMATS = [
+    ('native.csv', write_native),
+    ('airodump-01.csv', write_airodump),
+    ('kismet.csv', write_kismet_csv),
+    ('kismet.netxml', write_kismet_netxml),
+]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--networks', type=int, default=100000)
+    parser.add_argument('--keep', help='write the sample files to this directory instead of a temporary one')
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        sample_dir = args.keep or tmp
+        os.makedirs(sample_dir, exist_ok=True)
+        os.environ['DATABASE_URI'] = f'sqlite:///{os.path.join(tmp, "parse.db")}'
+        from app.src import create_app, db
+        from app.src.utils import parse_scan_file
+        
+        app = create_app()
+        with app.app_context():
+            db.create_all()
+            print(f'{args.networks} networks per file')
+            for filename, writer in FORMATS:
+                path = os.path.join(sample_dir, filename)
+                writer(path, args.networks)
+                
+                started = time.perf_counter()
+                with open(path, 'rb') as stream:
+                    scans, errors, duplicates, file_format = parse_scan_file(stream, 1, 1)
+                elapsed = time.perf_counter() - started
+                
+                # Separate pass for memory, tracemalloc slows parsing down considerably
+                del scans
+                tracemalloc.start()
+                with open(path, 'rb') as stream:
+                    scans = parse_scan_file(stream, 1, 1)[0]
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                
+                print(f'  {file_format:<16} {os.path.getsize(path) / 1e6:7.1f} MB  {len(scans):8d} scans  '
+                      f'{len(errors):4d} errors  {len(scans) / elapsed:10.0f} rows/s  peak {peak / 1e6:7.1f} MB')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Parallel upload benchmark: start gunicorn with the production config and have
+one client per environment upload fresh CSV files concurrently, first with
+every environment in the primary database and then with SHARD_FOLDER set so
+each environment writes to its own SQLite file.
+
+    python benchmarks/shard_uploads.py [--environments 4] [--rows 5000] [--duration 20]
+"""
+import argparse
+import multiprocessing
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+import uuid
+
+from load_test import REPO_ROOT, free_port, login, wait_until_up
+
+SEED = """
+from app.src import create_app, db
+from app.src.models import User, Environment
+app = create_app()
+with app.app_context():
+    db.create_all()
+    user = User(username='loadtest', is_admin=True, is_approved=True)
+    user.set_password('loadtest')
+    db.session.add(user)
+    db.session.flush()
+    for i in range({environments}):
+        db.session.add(Environment(name=f'Site {i}', created_by=user.id))
+    db.session.commit()
+"""
+
+def csv_file(rows, serial):
+    """A CSV of rows networks that no earlier file contained"""
+    lines = ['bssid,ssid,quality,signal,channel,encryption,timestamp']
+    for i in range(rows):
+        lines.append(f'02:{serial >> 8 & 255:02X}:{serial & 255:02X}:{i >> 16 & 255:02X}:{i >> 8 & 255:02X}:{i & 255:02X},'
+                     f'net-{i},{i % 100},{-30 - i % 60},{1 + i % 11},WPA2,2024-01-01 12:00:00')
+    return ('\n'.join(lines) + '\n').encode()
+
+def upload_loop(base_url, cookie, environment_id, rows, deadline, results):
+    url = f'{base_url}/environment/{environment_id}/upload'
+    completed = errors = 0
+    serial = 0
+    while time.time() < deadline:
+        serial += 1
+        try:
+            request = urllib.request.Request(url, headers={'Cookie': cookie})
+            page = urllib.request.urlopen(request, timeout=60).read().decode()
+            token = re.search(r'name="csrf_token" type="hidden" value="([^"]+)"', page).group(1)
+            
+            boundary = uuid.uuid4().hex
+            body = (f'--{boundary}\r\nContent-Disposition: form-data; name="csrf_token"\r\n\r\n{token}\r\n'
+                    f'--{boundary}\r\nContent-Disposition: form-data; name="csv_file"; filename="scan.csv"\r\n'
+                    f'Content-Type: text/csv\r\n\r\n').encode() + csv_file(rows, serial) + f'\r\n--{boundary}--\r\n'.encode()
+            request = urllib.request.Request(url, data=body, headers={
+                'Cookie': cookie, 'Content-Type': f'multipart/form-data; boundary={boundary}'})
+            with urllib.request.urlopen(request, timeout=60) as response:
+                response.read()
+                # A successful upload redirects to the environment page; failures re-render the form
+                succeeded = response.url.endswith(f'/environment/{environment_id}')
+            if succeeded:
+                completed += 1
+            else:
+                errors += 1
+        except OSError:
+            errors += 1
+    results.append((completed, errors))
+
+def run(env, args):
+    port = free_port()
+    base_url = f'http://127.0.0.1:{port}'
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}',
+         '--workers', str(args.workers), '--access-logfile', '/dev/null'],
+        cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_until_up(base_url)
+        cookie = login(base_url)
+        results = []
+        deadline = time.time() + args.duration
+        clients = [threading.Thread(target=upload_loop, args=(base_url, cookie, environment_id, args.rows, deadline, results))
+                   for environment_id in range(1, args.environments + 1)]
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        uploads = sum(result[0] for result in results)
+        errors = sum(result[1] for result in results)
+        return uploads / args.duration, errors
+    finally:
+        server.terminate()
+        server.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--environments', type=int, default=4)
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count())
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--duration', type=float, default=20)
+    args = parser.parse_args()
+    
+    print(f'{args.environments} environment(s), one uploading client each, {args.workers} worker(s), '
+          f'{args.rows} rows/file, {args.duration:.0f}s per mode')
+    for mode in ('shared', 'sharded'):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, PYTHONPATH=REPO_ROOT, SECRET_KEY='load-test', MAX_CONTENT_LENGTH=str(16 * 1024 * 1024),
+                       UPLOAD_FOLDER=os.path.join(tmp, 'uploads'), DATABASE_URI=f'sqlite:///{os.path.join(tmp, "load.db")}')
+            if mode == 'sharded':
+                env['SHARD_FOLDER'] = os.path.join(tmp, 'shards')
+            subprocess.run([sys.executable, '-c', SEED.replace('{environments}', str(args.environments))],
+                           cwd=REPO_ROOT, env=env, check=True)
+            uploads, errors = run(env, args)
+            print(f'  {mode:<8} {uploads:6.2f} uploads/s   {uploads * args.rows:9.0f} rows/s   errors={errors}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Snapshot cache benchmark: seed one environment with N scans, then compare
+loading it as WirelessScan ORM objects against building an EnvironmentSnapshot
+(time and traced memory), and time warm sorts/filters served from the cache.
+
+    python benchmarks/snapshot_cache.py [--scans 100000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+def measure(label, func, reset=None):
+    """Time one untraced run, then repeat under tracemalloc for memory"""
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    if reset:
+        reset()
+    tracemalloc.start()
+    result = func()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'{label:<28} {elapsed * 1000:9.1f} ms   retained {current / 1048576:7.1f} MB   peak {peak / 1048576:7.1f} MB')
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scans', type=int, default=100000)
+    args = parser.parse_args()
+    
+    workdir = tempfile.mkdtemp(prefix='wifi-snapshot-')
+    os.environ['DATABASE_URI'] = f'sqlite:///{os.path.join(workdir, "bench.db")}'
+    
+    from app.src import create_app, db
+    from app.src.models import User, Environment, WirelessScan
+    from app.src.snapshot import EnvironmentSnapshot, get_snapshot_cache
+    
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        user = User(username='bench', is_admin=True, is_approved=True)
+        user.set_password('bench')
+        db.session.add(user)
+        db.session.commit()
+        environment = Environment(name='bench', created_by=user.id)
+        db.session.add(environment)
+        db.session.commit()
+        
+        base = datetime(2024, 1, 1)
+        rows = [{
+            'environment_id': environment.id,
+            'bssid': f'02:{i >> 24 & 255:02X}:{i >> 16 & 255:02X}:{i >> 8 & 255:02X}:{i & 255:02X}:01',
+            'ssid': f'net-{i % 5000}',
+            'quality': i % 101,
+            'signal': -30 - i % 65,
+            'channel': 1 + i % 11,
+            'encryption': ('WPA2', 'WPA3', 'WEP', 'Open')[i % 4],
+            'timestamp': base + timedelta(seconds=i),
+            'uploaded_by': user.id,
+            'rogue_ap_potential': i % 50 == 0
+        } for i in range(args.scans)]
+        db.session.execute(db.insert(WirelessScan), rows)
+        db.session.commit()
+        del rows
+        environment_id = environment.id
+        version = environment.snapshot_version
+        db.session.expunge_all()
+        
+        print(f'{args.scans} scans')
+        measure('ORM objects', lambda: WirelessScan.query.filter_by(environment_id=environment_id).all(),
+                reset=db.session.expunge_all)
+        db.session.expunge_all()
+        snapshot = measure('EnvironmentSnapshot', lambda: EnvironmentSnapshot.load(environment_id, version))
+        print(f'{"snapshot.nbytes estimate":<28} {snapshot.nbytes / 1048576:9.1f} MB')
+        
+        cache = get_snapshot_cache()
+        cache.get(environment_id)
+        measure('warm get + sort by signal', lambda: cache.get(environment_id).indices('signal', False))
+        measure('warm get + rogue filter', lambda: list(cache.get(environment_id).rows(cache.get(environment_id).indices(rogue=True))))
+        print(cache.stats)
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,11 @@
 #!/bin/bash
 
 # Ensure required directories exist and have correct permissions
-mkdir -p /app/data /app/uploads /app/instance
-chown -R appuser:appuser /app/data /app/uploads /app/instance
+mkdir -p /app/data /app/uploads /app/instance /app/archives
+chown -R appuser:appuser /app/data /app/uploads /app/instance /app/archives
+
+# Create/upgrade the schema once, before any worker starts
+su -s /bin/bash appuser -c "flask init-db" || exit 1
 
 # Switch to appuser and run the application
 exec su -s /bin/bash appuser -c "exec $*"
\ No newline at end of file
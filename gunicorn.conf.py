@@ -0,0 +1,41 @@
+# Gunicorn configuration (loaded automatically from the working directory)
+#
+# The app is built once in the master (preload_app) and shared with workers
+# copy-on-write; the schema is created beforehand by `flask init-db`.
+# Every setting can be overridden with a GUNICORN_* environment variable.
+import multiprocessing
+import os
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+wsgi_app = 'app.src:create_app()'
+preload_app = True
+
+# Threaded workers: a slow upload or export only occupies one thread, not a whole process.
+# Workers are capped because every process shares one SQLite write lock.
+worker_class = 'gthread'
+workers = _env_int('GUNICORN_WORKERS', min(multiprocessing.cpu_count() * 2 + 1, 9))
+threads = _env_int('GUNICORN_THREADS', 4)
+
+# Long uploads/exports need more than the 30s default before a worker is killed
+timeout = _env_int('GUNICORN_TIMEOUT', 120)
+graceful_timeout = _env_int('GUNICORN_GRACEFUL_TIMEOUT', 60)
+keepalive = _env_int('GUNICORN_KEEPALIVE', 5)
+
+# Recycle workers periodically (with jitter so they don't restart together)
+max_requests = _env_int('GUNICORN_MAX_REQUESTS', 2000)
+max_requests_jitter = _env_int('GUNICORN_MAX_REQUESTS_JITTER', 200)
+
+accesslog = os.environ.get('GUNICORN_ACCESSLOG', '-')
+
+# Size each worker's connection pool to its thread count (read by create_app)
+if not os.environ.get('DB_POOL_SIZE'):
+    os.environ['DB_POOL_SIZE'] = str(threads)
+
+def post_fork(server, worker):
+    # Workers must not share the master's pooled SQLite connections
+    from app.src import dispose_engines
+    dispose_engines(server.app.wsgi())
\ No newline at end of file
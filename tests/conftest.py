@@ -0,0 +1,35 @@
+import pytest
+from app.src import create_app, db
+from app.src.models import Environment, User
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_URI', f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setenv('UPLOAD_FOLDER', str(tmp_path / 'uploads'))
+    monkeypatch.setenv('ARCHIVE_FOLDER', str(tmp_path / 'archives'))
+    monkeypatch.delenv('SHARD_FOLDER', raising=False)
+    
+    app = create_app()
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    with app.app_context():
+        db.create_all()
+        admin = User(username='admin', is_admin=True, is_approved=True)
+        admin.set_password('secret1')
+        db.session.add(admin)
+        db.session.commit()
+        db.session.add(Environment(name='Lab', created_by=admin.id))
+        db.session.commit()
+    
+    yield app
+    
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+@pytest.fixture
+def client(app):
+    """Test client logged in as an admin; the environment 'Lab' has id 1"""
+    client = app.test_client()
+    client.post('/login', data={'username': 'admin', 'password': 'secret1'})
+    return client
@@ -0,0 +1,74 @@
+from datetime import datetime
+import pytest
+from app.src import db
+from app.src.deletion import PurgeClaimLost, claim_next_deletion, mark_for_deletion, purge_environment, purge_pending
+from app.src.models import Environment, WirelessScan
+from app.src.retention import enable_incremental_vacuum
+
+def _fill(app, count=3000):
+    with app.app_context():
+        db.session.add_all(WirelessScan(environment_id=1, bssid=f'AA:BB:CC:DD:{i // 256:02X}:{i % 256:02X}',
+                                        ssid='x' * 32, remarks='r' * 200, timestamp=datetime(2024, 1, 1),
+                                        uploaded_by=1) for i in range(count))
+        db.session.commit()
+
+def _mark(app):
+    with app.app_context():
+        mark_for_deletion(db.session.get(Environment, 1))
+        db.session.commit()
+
+def _purge(app):
+    _mark(app)
+    with app.app_context():
+        assert purge_pending(chunk_size=500) == [1]
+
+def _pragma(app, name):
+    with app.app_context():
+        return db.session.execute(db.text(f'PRAGMA {name}')).scalar()
+
+def test_purge_never_runs_a_full_vacuum(app):
+    _fill(app)
+    _purge(app)
+    assert _pragma(app, 'auto_vacuum') == 0
+    assert _pragma(app, 'freelist_count') > 0
+
+def test_purge_frees_pages_incrementally(app):
+    with app.app_context():
+        enable_incremental_vacuum()
+    _fill(app)
+    _purge(app)
+    assert _pragma(app, 'auto_vacuum') == 2
+    assert _pragma(app, 'freelist_count') == 0
+
+def test_only_one_purge_run_claims_an_environment(app):
+    _fill(app, 1000)
+    _mark(app)
+    with app.app_context():
+        assert claim_next_deletion('first') == 1
+        assert claim_next_deletion('second') is None
+        
+        # The first run stalls past its lease; another run takes over and the first one backs off
+        Environment.query.filter_by(id=1).update({Environment.purge_lease_until: datetime(2000, 1, 1)})
+        db.session.commit()
+        assert claim_next_deletion('second') == 1
+        with pytest.raises(PurgeClaimLost):
+            purge_environment(1, chunk_size=500, owner='first')
+        db.session.rollback()
+        purge_environment(1, chunk_size=500, owner='second')
+        assert db.session.get(Environment, 1) is None
+
+def test_environments_page_does_not_start_the_purger(app, client):
+    _mark(app)
+    response = client.get('/environments')
+    assert response.status_code == 200
+    assert 'environment_purger' not in app.extensions
+
+def test_name_of_a_deleting_environment_can_be_reused(app, client):
+    response = client.post('/environment/new', data={'name': 'Lab'}, follow_redirects=True)
+    assert b'Environment name already exists' in response.data
+    
+    _mark(app)
+    response = client.post('/environment/new', data={'name': 'Lab'}, follow_redirects=True)
+    assert b'Environment name already exists' not in response.data
+    with app.app_context():
+        assert Environment.active().filter_by(name='Lab').count() == 1
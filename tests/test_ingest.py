@@ -0,0 +1,52 @@
+import io
+import pytest
+from app.src import db
+from app.src.ingest import get_write_buffer, parse_sensor_record
+from app.src.models import SensorToken, WirelessScan
+
+HEADER = b'bssid,ssid,quality,signal,channel,encryption,timestamp\n'
+
+MALFORMED_BSSIDS = ['AA:BB:CC:DD:EE: F', 'AA:BB:CC:DD:EE:-F', 'AA:BB:CC:DD:EE:+F', 'AA-BB-CC-DD-EE-FF',
+                    'AA:BB:CC:DD:EE:FG', 'AA:BB:CC:DD:EE']
+
+def _record(**fields):
+    record = {'bssid': 'AA:BB:CC:DD:EE:FF', 'ssid': 'Net', 'signal': -42, 'channel': 6, 'encryption': 'WPA2',
+              'timestamp': '2024-01-01 10:00:00'}
+    record.update(fields)
+    return record
+
+@pytest.mark.parametrize('bssid', MALFORMED_BSSIDS)
+def test_sensor_record_rejects_malformed_bssid(bssid):
+    row, error = parse_sensor_record(_record(bssid=bssid), 1, 1)
+    assert row is None
+    assert error.startswith('Invalid BSSID format')
+
+@pytest.mark.parametrize('bssid', MALFORMED_BSSIDS)
+def test_csv_upload_rejects_malformed_bssid(client, bssid):
+    data = HEADER + f'{bssid},Net,85,-42,6,WPA2,2024-01-01 10:00:00\n'.encode()
+    response = client.post('/environment/1/upload', data={'csv_file': (io.BytesIO(data), 'scan.csv')},
+                           content_type='multipart/form-data', follow_redirects=True)
+    assert b'Invalid BSSID format' in response.data
+
+def test_sensor_record_matches_csv_rules():
+    row, error = parse_sensor_record(_record(bssid=' aa:bb:cc:dd:ee:ff ', encryption='W' * 60, quality=0), 1, 1)
+    assert error is None
+    assert (row['bssid'], row['quality'], row['signal'], len(row['encryption'])) == ('AA:BB:CC:DD:EE:FF', 0, -42, 50)
+    
+    row, error = parse_sensor_record(_record(ssid='S' * 33), 1, 1)
+    assert row is None and error.startswith('SSID too long')
+
+def test_push_stores_only_valid_records(app):
+    with app.app_context():
+        sensor_token, token = SensorToken.generate('roof', 1, 1)
+        db.session.add(sensor_token)
+        db.session.commit()
+    
+    records = [_record(bssid=bssid) for bssid in MALFORMED_BSSIDS] + [_record()]
+    response = app.test_client().post('/api/v1/scans', json=records, headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 202
+    assert (response.get_json()['accepted'], response.get_json()['rejected']) == (1, len(MALFORMED_BSSIDS))
+    
+    with app.app_context():
+        get_write_buffer().flush()
+        assert [bssid for (bssid,) in db.session.query(WirelessScan.bssid)] == ['AA:BB:CC:DD:EE:FF']
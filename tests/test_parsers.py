@@ -0,0 +1,50 @@
+import io
+import tempfile
+from app.src.parsers import AirodumpCSVParser, KismetCSVParser, NativeCSVParser
+
+NATIVE_CSV = b'bssid,ssid,quality,signal,channel,encryption,timestamp\nAA:BB:CC:DD:EE:FF,Net,85,-42,6,WPA2,2023-12-01 10:30:00\n'
+
+AIRODUMP_CSV = (
+    b'\r\nBSSID, First time seen, Last time seen, channel, Speed, Privacy, Cipher, Authentication, Power, '
+    b'# beacons, # IV, LAN IP, ID-length, ESSID, Key\r\n'
+    b'AA:BB:CC:DD:EE:FF, 2023-12-01 10:30:00, 2023-12-01 10:35:00,  6, 54, WPA2, CCMP, PSK, -42, 10, 0, '
+    b'  0.  0.  0.  0,   3, Net, \r\n'
+)
+
+KISMET_CSV = (
+    b'Network;NetType;ESSID;BSSID;Info;Channel;Cloaked;Encryption;Decrypted;MaxRate;MaxSeenRate;Beacon;LLC;'
+    b'Data;Crypt;Weak;Total;Carrier;Encoding;FirstTime;LastTime;BestQuality;BestSignal;BestNoise\n'
+    b'1;infrastructure;Net;AA:BB:CC:DD:EE:FF;;6;No;WPA2;No;54.0;0;10;0;0;0;0;0;IEEE 802.11g;;'
+    b'Fri Dec  1 10:30:00 2023;Fri Dec  1 10:35:00 2023;0;-42;0\n'
+)
+
+def _spooled(data):
+    # The buffer Werkzeug hands uploads over in
+    stream = tempfile.SpooledTemporaryFile(max_size=500 * 1024, mode='wb+')
+    stream.write(data)
+    stream.seek(0)
+    return stream
+
+class _ReadOnlyStream:
+    """Binary stream with only read(), like SpooledTemporaryFile before Python 3.11"""
+    
+    def __init__(self, data):
+        self._buffer = io.BytesIO(data)
+    
+    def read(self, size=-1):
+        return self._buffer.read(size)
+
+def test_parsers_read_spooled_uploads():
+    for parser, data in ((NativeCSVParser(), NATIVE_CSV), (AirodumpCSVParser(), AIRODUMP_CSV),
+                         (KismetCSVParser(), KISMET_CSV)):
+        records = list(parser.iter_records(_spooled(data)))
+        assert [record['bssid'] for record in records] == ['AA:BB:CC:DD:EE:FF'], parser.name
+
+def test_parsers_read_streams_without_readable():
+    records = list(NativeCSVParser().iter_records(_ReadOnlyStream(NATIVE_CSV)))
+    assert records[0]['ssid'] == 'Net'
+
+def test_upload_accepts_csv(client):
+    response = client.post('/environment/1/upload', data={'csv_file': (io.BytesIO(NATIVE_CSV), 'scan.csv')},
+                           content_type='multipart/form-data', follow_redirects=True)
+    assert b'Successfully uploaded 1' in response.data
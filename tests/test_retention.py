@@ -0,0 +1,28 @@
+import io
+from app.src import db
+from app.src.models import Environment
+from app.src.retention import archive_scans, iter_archived_scans
+
+def _upload(client, timestamp, filename):
+    data = f'bssid,ssid,quality,signal,channel,encryption,timestamp\nAA:BB:CC:DD:EE:01,Net,50,-60,6,WPA2,{timestamp}\n'
+    response = client.post('/environment/1/upload', data={'csv_file': (io.BytesIO(data.encode()), filename)},
+                           content_type='multipart/form-data', follow_redirects=True)
+    assert b'Successfully uploaded 1' in response.data
+
+def _archive(app):
+    with app.app_context():
+        assert archive_scans(db.session.get(Environment, 1)) is not None
+
+def test_export_prefers_the_newest_archived_copy(app, client):
+    _upload(client, '2024-01-01 12:00:00', 'old.csv')
+    _archive(app)
+    _upload(client, '2025-01-01 12:00:00', 'new.csv')
+    _archive(app)
+    
+    with app.app_context():
+        archived = list(iter_archived_scans(1, seen=set()))
+    assert [scan.timestamp.year for scan in archived] == [2025]
+    
+    response = client.get('/environment/1/export')
+    assert response.data.count(b'AA:BB:CC:DD:EE:01') == 1
+    assert b'2025-01-01' in response.data and b'2024-01-01' not in response.data
@@ -0,0 +1,35 @@
+import io
+import pytest
+from app.src import db
+from app.src.models import Environment
+
+CSV = b'bssid,ssid,quality,signal,channel,encryption,timestamp\nAA:BB:CC:DD:EE:FF,Net,85,-42,6,WPA2,2023-12-01 10:30:00\n'
+
+@pytest.fixture
+def shard_folder(app, tmp_path):
+    folder = tmp_path / 'shards'
+    app.config['SHARD_FOLDER'] = str(folder)
+    with app.app_context():
+        db.session.add_all(Environment(name=f'Empty {i}', created_by=1) for i in range(4))
+        db.session.commit()
+    yield folder
+    router = app.extensions.pop('shard_router', None)
+    if router is not None:
+        for engine in router.engines() + [router.empty_engine]:
+            engine.dispose()
+
+def test_reads_do_not_create_shard_files(client, shard_folder):
+    for url in ('/environments', '/admin/dashboard', '/environment/1', '/environment/1/export'):
+        assert client.get(url).status_code == 200, url
+    assert not shard_folder.exists() or not list(shard_folder.iterdir())
+
+def test_first_upload_creates_the_shard(client, shard_folder):
+    response = client.post('/environment/2/upload', data={'csv_file': (io.BytesIO(CSV), 'scan.csv')},
+                           content_type='multipart/form-data', follow_redirects=True)
+    assert b'Successfully uploaded 1' in response.data
+    assert sorted(path.name for path in shard_folder.glob('*.db')) == ['environment_2.db']
+    
+    response = client.get('/environments')
+    assert response.status_code == 200
+    assert b'AA:BB:CC:DD:EE:FF' in client.get('/environment/2').data
+    assert b'AA:BB:CC:DD:EE:FF' not in client.get('/environment/1').data
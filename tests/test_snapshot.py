@@ -0,0 +1,34 @@
+from datetime import datetime
+from app.src import db
+from app.src.models import Environment, WirelessScan
+from app.src.snapshot import EnvironmentSnapshot, bssid_to_int
+
+def _add_scan(app, bssid, ssid='Net'):
+    with app.app_context():
+        db.session.add(WirelessScan(environment_id=1, bssid=bssid, ssid=ssid, timestamp=datetime(2024, 1, 1),
+                                    uploaded_by=1))
+        Environment.bump_data_version([1])
+        db.session.commit()
+
+def test_bssid_to_int_rejects_malformed_values():
+    assert bssid_to_int('AA:BB:CC:DD:EE:FF') == 0xAABBCCDDEEFF
+    for bssid in ('AA:BB:CC:DD:EE: F', 'AA:BB:CC:DD:EE:-F', 'aa:bb:cc:dd:ee:ff', 'AABBCCDDEEFF', '', None):
+        assert bssid_to_int(bssid) is None
+
+def test_snapshot_keeps_malformed_bssids_as_text(app):
+    _add_scan(app, 'AA:BB:CC:DD:EE:FF')
+    _add_scan(app, 'AA:BB:CC:DD:EE: F')
+    _add_scan(app, 'AA:BB:CC:DD:EE:+F')
+    with app.app_context():
+        snapshot = EnvironmentSnapshot.load(1, None)
+        assert sorted(row.bssid for row in snapshot.rows()) == ['AA:BB:CC:DD:EE: F', 'AA:BB:CC:DD:EE:+F',
+                                                               'AA:BB:CC:DD:EE:FF']
+        assert snapshot.unique_networks == 3
+        assert len(snapshot.indices(sort='bssid')) == 3
+
+def test_pages_render_with_malformed_bssid(app, client):
+    _add_scan(app, 'AA:BB:CC:DD:EE: F')
+    for url in ('/environment/1', '/environment/1?sort=bssid&order=asc', '/environment/1/export'):
+        response = client.get(url)
+        assert response.status_code == 200, url
+        assert b'AA:BB:CC:DD:EE: F' in response.data, url
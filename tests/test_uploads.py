@@ -0,0 +1,26 @@
+import io
+from sqlalchemy import event
+from app.src import db
+from app.src.models import Upload
+
+def test_upload_is_saved_in_one_primary_commit(app, client):
+    rows = ''.join(f'AA:BB:CC:DD:{i // 256:02X}:{i % 256:02X},n{i},50,-60,6,WPA2,2024-01-01 12:00:00\n' for i in range(2000))
+    data = ('bssid,ssid,quality,signal,channel,encryption,timestamp\n' + rows).encode()
+    
+    commits = []
+    with app.app_context():
+        engine = db.engine
+    listener = commits.append
+    event.listen(engine, 'commit', listener)
+    try:
+        response = client.post('/environment/1/upload', data={'csv_file': (io.BytesIO(data), 'scan.csv')},
+                               content_type='multipart/form-data', follow_redirects=False)
+    finally:
+        event.remove(engine, 'commit', listener)
+    
+    assert response.status_code == 302
+    assert len(commits) == 1
+    with app.app_context():
+        upload = Upload.query.one()
+        assert upload.inserted_rows == 2000
+        assert upload.commit_ms >= 0